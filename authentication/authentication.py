@@ -0,0 +1,95 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+
+
+class TokenCache:
+    """
+    TTL-bounded LRU of token key -> ``(user, token)``.
+
+    Entries live in process memory and, when ``TOKEN_AUTH_CACHE["CACHE_ALIAS"]``
+    is set, in that shared Django cache as well, so other processes can skip
+    the database too. Signal handlers in ``authentication.signals`` evict
+    entries when tokens are deleted or their users change; the TTL bounds how
+    long another process can keep serving an entry evicted elsewhere.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def options(self):
+        return settings.TOKEN_AUTH_CACHE
+
+    def _shared_cache(self):
+        alias = self.options.get("CACHE_ALIAS")
+        return caches[alias] if alias else None
+
+    @staticmethod
+    def _shared_key(key):
+        return "authentication:token:" + hashlib.sha256(key.encode()).hexdigest()
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    return entry[1]
+                del self._entries[key]
+
+        shared = self._shared_cache()
+        if shared is not None:
+            value = shared.get(self._shared_key(key))
+            if value is not None:
+                self._store(key, value)
+                return value
+        return None
+
+    def set(self, key, value):
+        self._store(key, value)
+        shared = self._shared_cache()
+        if shared is not None:
+            shared.set(self._shared_key(key), value, self.options["TTL"])
+
+    def _store(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.options["TTL"], value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.options["MAX_SIZE"]:
+                self._entries.popitem(last=False)
+
+    def delete_many(self, keys):
+        keys = list(keys)
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+        shared = self._shared_cache()
+        if shared is not None and keys:
+            shared.delete_many([self._shared_key(key) for key in keys])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that serves repeat lookups from ``token_cache``."""
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is not None:
+            return cached
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, (user, token))
+        return user, token
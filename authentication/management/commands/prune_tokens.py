@@ -0,0 +1,48 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from authentication.pruning import prune_expired_tokens
+
+
+class Command(BaseCommand):
+    help = "Delete expired simplejwt outstanding and blacklisted tokens in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.TOKEN_PRUNE_BATCH_SIZE,
+            help="Maximum number of outstanding tokens deleted per transaction.",
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.0,
+            help="Seconds to sleep between batches.",
+        )
+        parser.add_argument(
+            "--every",
+            type=float,
+            default=0,
+            help="Keep running and prune again every this many seconds "
+            "(default: prune once and exit).",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            result = prune_expired_tokens(
+                batch_size=options["batch_size"], pause=options["pause"]
+            )
+            self.stdout.write(
+                self.style.SUCCESS(
+                    "Removed {outstanding} outstanding and {blacklisted} blacklisted "
+                    "token(s) in {batches} batch(es), {seconds:.2f}s.".format(**result)
+                )
+            )
+            if not options["every"]:
+                break
+            close_old_connections()
+            time.sleep(options["every"])
@@ -0,0 +1,42 @@
+import time
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+
+
+def prune_expired_tokens(batch_size=1000, pause=0.0):
+    """
+    Delete expired outstanding tokens and their blacklist entries in batches.
+
+    Each batch is its own short transaction over at most ``batch_size``
+    outstanding rows, so the tables are never locked for long. ``pause``
+    seconds are slept between batches to leave room for other writers.
+    """
+    started = time.monotonic()
+    cutoff = timezone.now()
+    result = {"outstanding": 0, "blacklisted": 0, "batches": 0}
+
+    while True:
+        ids = list(
+            OutstandingToken.objects.filter(expires_at__lte=cutoff)
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        with transaction.atomic():
+            _, deleted = OutstandingToken.objects.filter(id__in=ids).delete()
+        result["outstanding"] += deleted.get(OutstandingToken._meta.label, 0)
+        result["blacklisted"] += deleted.get(BlacklistedToken._meta.label, 0)
+        result["batches"] += 1
+        if len(ids) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+
+    result["seconds"] = time.monotonic() - started
+    return result
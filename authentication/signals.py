@@ -0,0 +1,21 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import token_cache
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    token_cache.delete_many([instance.key])
+
+
+@receiver(post_save, sender=get_user_model())
+def user_saved(sender, instance, created, **kwargs):
+    # Any change may revoke access (is_active, is_staff, ...), so drop the
+    # cached lookups for this user's tokens.
+    if not created:
+        token_cache.delete_many(
+            Token.objects.filter(user_id=instance.pk).values_list("key", flat=True)
+        )
@@ -1,7 +1,22 @@
+import uuid
+from datetime import timedelta
+from io import StringIO
+
 import pytest
+from django.core.management import call_command
+from django.db import IntegrityError
 from django.urls import reverse
+from django.utils import timezone
 from django.contrib.auth import get_user_model
+from rest_framework.authtoken.models import Token
+from authentication.authentication import token_cache
+from authentication import provisioning as provision
+from authentication.provisioning import provision_users, read_users
 from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
 
 User = get_user_model()
 
@@ -69,3 +84,231 @@ def test_verify_jwt_token(api_client, create_user):
     verify_url = reverse("token_verify")
     verify_response = api_client.post(verify_url, {"token": access_token})
     assert verify_response.status_code == 200
+
+
+@pytest.fixture
+def token_client(api_client):
+    def _token_client(user):
+        token = Token.objects.create(user=user)
+        api_client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        return api_client, token
+
+    return _token_client
+
+
+@pytest.mark.django_db
+def test_token_lookup_is_cached(token_client, create_user, django_assert_num_queries):
+    user = create_user("testuser", "testpassword")
+    client, _ = token_client(user)
+
+    with django_assert_num_queries(2):
+        response = client.get("/api/pizzas/")
+    assert response.status_code == 200
+    assert response.wsgi_request.user == user
+
+    with django_assert_num_queries(1):
+        response = client.get("/api/pizzas/")
+    assert response.status_code == 200
+    assert response.wsgi_request.user == user
+
+
+@pytest.mark.django_db
+def test_deleted_token_is_rejected(token_client, create_user):
+    user = create_user("testuser", "testpassword")
+    client, token = token_client(user)
+    assert client.get("/api/pizzas/").status_code == 200
+
+    token.delete()
+
+    assert client.get("/api/pizzas/").status_code == 401
+
+
+@pytest.mark.django_db
+def test_deactivated_user_is_rejected(token_client, create_user):
+    user = create_user("testuser", "testpassword")
+    client, _ = token_client(user)
+    assert client.get("/api/pizzas/").status_code == 200
+
+    user.is_active = False
+    user.save()
+
+    assert client.get("/api/pizzas/").status_code == 401
+
+
+@pytest.mark.django_db
+def test_revoked_staff_status_takes_effect(token_client):
+    user = User.objects.create_user(
+        username="staffuser", password="testpassword", is_staff=True
+    )
+    client, _ = token_client(user)
+    assert client.get("/api/ingredients/").status_code == 200
+
+    user.is_staff = False
+    user.save()
+
+    assert client.get("/api/ingredients/").status_code == 403
+
+
+@pytest.mark.django_db
+def test_token_lookup_uses_shared_cache(
+    token_client, create_user, settings, django_assert_num_queries
+):
+    settings.TOKEN_AUTH_CACHE = {**settings.TOKEN_AUTH_CACHE, "CACHE_ALIAS": "default"}
+    user = create_user("testuser", "testpassword")
+    client, token = token_client(user)
+    client.get("/api/pizzas/")
+
+    token_cache.clear()
+    with django_assert_num_queries(1):
+        assert client.get("/api/pizzas/").status_code == 200
+
+    token.delete()
+    assert client.get("/api/pizzas/").status_code == 401
+
+
+@pytest.fixture
+def create_outstanding_tokens():
+    def _create_outstanding_tokens(count, expires_in, blacklisted=False):
+        tokens = OutstandingToken.objects.bulk_create(
+            OutstandingToken(
+                jti=uuid.uuid4().hex,
+                token="token",
+                expires_at=timezone.now() + expires_in,
+            )
+            for _ in range(count)
+        )
+        if blacklisted:
+            BlacklistedToken.objects.bulk_create(
+                BlacklistedToken(token=token) for token in tokens
+            )
+        return tokens
+
+    return _create_outstanding_tokens
+
+
+@pytest.mark.django_db
+def test_prune_tokens_command(create_outstanding_tokens):
+    create_outstanding_tokens(3, timedelta(days=-1), blacklisted=True)
+    create_outstanding_tokens(2, timedelta(days=-1))
+    live = create_outstanding_tokens(2, timedelta(days=1), blacklisted=True)
+
+    out = StringIO()
+    call_command("prune_tokens", "--batch-size", "2", stdout=out)
+
+    assert "Removed 5 outstanding and 3 blacklisted token(s) in 3 batch(es)" in (
+        out.getvalue()
+    )
+    assert set(OutstandingToken.objects.all()) == set(live)
+    assert BlacklistedToken.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_prune_tokens_every_keeps_running(create_outstanding_tokens, monkeypatch):
+    create_outstanding_tokens(2, timedelta(days=-1))
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) == 2:
+            raise KeyboardInterrupt
+        create_outstanding_tokens(1, timedelta(days=-1))
+
+    monkeypatch.setattr(
+        "authentication.management.commands.prune_tokens.time.sleep", sleep
+    )
+    out = StringIO()
+    with pytest.raises(KeyboardInterrupt):
+        call_command("prune_tokens", "--every", "60", stdout=out)
+
+    assert sleeps == [60, 60]
+    assert out.getvalue().count("Removed") == 2
+    assert "Removed 1 outstanding" in out.getvalue()
+    assert OutstandingToken.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_refresh_rotation_rows_are_pruned_after_expiry(api_client, create_user):
+    create_user("testuser", "testpassword")
+    obtain_response = api_client.post(
+        reverse("token_obtain_pair"),
+        {"username": "testuser", "password": "testpassword"},
+    )
+    api_client.post(
+        reverse("token_refresh"), {"refresh": obtain_response.data["refresh"]}
+    )
+    assert BlacklistedToken.objects.count() == 1
+
+    OutstandingToken.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+    call_command("prune_tokens", stdout=StringIO())
+
+    assert OutstandingToken.objects.count() == 0
+    assert BlacklistedToken.objects.count() == 0
+
+
+@pytest.fixture
+def fast_hasher(settings):
+    """Fixture swapping PBKDF2 for a cheap hasher; forked workers inherit it."""
+    settings.PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+
+@pytest.mark.django_db
+def test_provision_users_from_csv(tmp_path, fast_hasher, django_assert_num_queries):
+    """Test bulk provisioning with one existence query and one bulk insert."""
+    User.objects.create_user(username="existing", password="old-password")
+    users_file = tmp_path / "users.csv"
+    users_file.write_text(
+        "username,email,password,is_staff\n"
+        "existing,existing@example.com,new-password,true\n"
+        "alice,alice@EXAMPLE.com,alice-password,true\n"
+        "bob,,bob-password,no\n"
+        "alice,again@example.com,other,false\n"
+        ",nobody@example.com,x,false\n"
+    )
+
+    with django_assert_num_queries(2):
+        result = provision_users(read_users(users_file), workers=2)
+
+    assert (result["created"], result["existing"], result["skipped"]) == (2, 1, 2)
+    assert result["users_per_second"] > 0
+    alice = User.objects.get(username="alice")
+    assert alice.is_staff and alice.email == "alice@example.com"
+    assert alice.check_password("alice-password")
+    assert not User.objects.get(username="bob").is_staff
+    assert User.objects.get(username="existing").check_password("old-password")
+
+
+@pytest.mark.django_db
+def test_provision_users_is_idempotent(tmp_path, fast_hasher):
+    """Test that provisioning the same JSON file twice creates nothing new."""
+    users_file = tmp_path / "users.json"
+    users_file.write_text(
+        '[{"username": "root", "password": "secret", "is_superuser": true},'
+        ' {"username": "carol"}]'
+    )
+
+    first = provision_users(read_users(users_file), workers=1)
+    second = provision_users(read_users(users_file), workers=1)
+
+    assert (first["created"], second["created"], second["existing"]) == (2, 0, 2)
+    root = User.objects.get(username="root")
+    assert root.is_superuser and root.is_staff
+    assert not User.objects.get(username="carol").has_usable_password()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_provision_users_fails_on_concurrent_insert(tmp_path, fast_hasher, monkeypatch):
+    """Test that a username taken after the existence check aborts the insert."""
+    users_file = tmp_path / "users.csv"
+    users_file.write_text("username,password\nalice,secret\nbob,secret\n")
+    hash_password = provision.make_password
+
+    def make_password(password):
+        if not User.objects.filter(username="bob").exists():
+            User.objects.create_user(username="bob")
+        return hash_password(password)
+
+    monkeypatch.setattr(provision, "make_password", make_password)
+    with pytest.raises(IntegrityError):
+        provision_users(read_users(users_file), workers=1, batch_size=1)
+
+    assert list(User.objects.values_list("username", flat=True)) == ["bob"]
@@ -0,0 +1,41 @@
+"""
+Compare two benchmark reports written by the benchmark suite.
+
+Usage: python -m benchmarks.compare baseline.json candidate.json
+"""
+
+import json
+import sys
+
+COLUMNS = ["p50_ms", "p90_ms", "p99_ms", "queries"]
+
+
+def load(path):
+    with open(path) as report_file:
+        return json.load(report_file)["results"]
+
+
+def change(before, after):
+    if not before:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.1f}%"
+
+
+def main(baseline_path, candidate_path):
+    baseline, candidate = load(baseline_path), load(candidate_path)
+    for size in sorted(set(baseline) & set(candidate), key=int):
+        print(f"\n{size} pizzas")
+        for route in sorted(set(baseline[size]) & set(candidate[size])):
+            before, after = baseline[size][route], candidate[size][route]
+            cells = [
+                f"{column} {before[column]} -> {after[column]} "
+                f"({change(before[column], after[column])})"
+                for column in COLUMNS
+            ]
+            print(f"  {route:42} " + " | ".join(cells))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit(__doc__.strip())
+    main(sys.argv[1], sys.argv[2])
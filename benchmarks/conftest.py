@@ -0,0 +1,150 @@
+import json
+import os
+import platform
+import random
+import statistics
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+
+from pizzeria.models import Ingredient, Pizza
+
+User = get_user_model()
+PizzaIngredient = Pizza.ingredients.through
+
+SIZES = [int(size) for size in os.environ.get("BENCHMARK_SIZES", "1000").split(",")]
+ITERATIONS = int(os.environ.get("BENCHMARK_ITERATIONS", 20))
+INGREDIENTS = int(os.environ.get("BENCHMARK_INGREDIENTS", 200))
+REPORT_PATH = os.environ.get("BENCHMARK_REPORT", "benchmark-report.json")
+BATCH_SIZE = 5000
+PASSWORD = "benchmark-password"
+
+
+class Catalog:
+    """Ids and credentials of a seeded benchmark catalog."""
+
+    def __init__(self, size, pizza_ids, ingredient_ids, staff, token):
+        self.size = size
+        self.pizza_ids = pizza_ids
+        self.ingredient_ids = ingredient_ids
+        self.staff = staff
+        self.token = token
+
+
+def seed_catalog(size):
+    """Bulk insert ``size`` pizzas with 5-15 ingredients each."""
+    rng = random.Random(size)
+    Ingredient.objects.bulk_create(
+        (
+            Ingredient(
+                name=f"Ingredient {i}", category=rng.choice(["basic", "premium"])
+            )
+            for i in range(INGREDIENTS)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    ingredient_ids = list(Ingredient.objects.values_list("pk", flat=True))
+
+    for start in range(0, size, BATCH_SIZE):
+        pizzas = Pizza.objects.bulk_create(
+            Pizza(
+                name=f"Pizza {i}",
+                price=Decimal(rng.randrange(500, 3000)) / 100,
+                status="active" if rng.random() < 0.8 else "inactive",
+            )
+            for i in range(start, min(start + BATCH_SIZE, size))
+        )
+        PizzaIngredient.objects.bulk_create(
+            (
+                PizzaIngredient(pizza_id=pizza.pk, ingredient_id=ingredient_id)
+                for pizza in pizzas
+                for ingredient_id in rng.sample(ingredient_ids, rng.randint(5, 15))
+            ),
+            batch_size=BATCH_SIZE,
+        )
+    Ingredient.objects.refresh_pizza_counts()
+
+    staff = User.objects.create_user(
+        username="benchmark-staff", password=PASSWORD, is_staff=True
+    )
+    token = Token.objects.create(user=staff)
+    pizza_ids = list(Pizza.objects.values_list("pk", flat=True))
+    return Catalog(size, pizza_ids, ingredient_ids, staff, token.key)
+
+
+def clear_catalog():
+    PizzaIngredient.objects.all().delete()
+    Pizza.objects.all().delete()
+    Ingredient.objects.all().delete()
+    User.objects.filter(username="benchmark-staff").delete()
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, round(fraction * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+def measure(call, iterations=ITERATIONS):
+    """
+    Run ``call`` repeatedly and summarize latency and SQL query counts.
+
+    The first call is reported separately as ``first_ms`` because it pays for
+    cold caches.
+    """
+    latencies, queries = [], []
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = call()
+            latencies.append((time.perf_counter() - start) * 1000)
+        assert response.status_code < 500, response.status_code
+        queries.append(len(captured.captured_queries))
+
+    ordered = sorted(latencies)
+    return {
+        "iterations": iterations,
+        "first_ms": round(latencies[0], 3),
+        "mean_ms": round(statistics.fmean(latencies), 3),
+        "p50_ms": round(percentile(ordered, 0.50), 3),
+        "p90_ms": round(percentile(ordered, 0.90), 3),
+        "p99_ms": round(percentile(ordered, 0.99), 3),
+        "max_ms": round(ordered[-1], 3),
+        "queries": max(queries),
+        "status": response.status_code,
+    }
+
+
+@pytest.fixture(scope="session")
+def benchmark_report():
+    """Fixture collecting results and writing the JSON report at the end."""
+    report = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "database": connection.vendor,
+            "sizes": SIZES,
+            "iterations": ITERATIONS,
+        },
+        "results": {},
+    }
+    yield report
+    if report["results"]:
+        with open(REPORT_PATH, "w") as report_file:
+            json.dump(report, report_file, indent=2, sort_keys=True)
+
+
+@pytest.fixture(scope="module", params=SIZES, ids=lambda size: f"{size}-pizzas")
+def catalog(request, django_db_setup, django_db_blocker):
+    """Fixture seeding one catalog size for every benchmark in the module."""
+    with django_db_blocker.unblock():
+        clear_catalog()
+        seeded = seed_catalog(request.param)
+    yield seeded
+    with django_db_blocker.unblock():
+        clear_catalog()
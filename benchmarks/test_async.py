@@ -0,0 +1,89 @@
+"""
+Concurrency benchmarks comparing the sync and async read endpoints.
+
+Every round fires ``BENCHMARK_CONCURRENCY`` simultaneous requests through
+Django's ASGI handler and waits for all of them; results land in the same
+report as ``test_endpoints.py`` under ``"<route> x<concurrency>"``.
+"""
+
+import asyncio
+import os
+import statistics
+import time
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test import AsyncClient
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .conftest import ITERATIONS, percentile
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+CONCURRENCY = int(os.environ.get("BENCHMARK_CONCURRENCY", 64))
+
+READ_ROUTES = {
+    "GET pizza-list": ("pizza-list", "async-pizza-list", False),
+    "GET pizza-detail": ("pizza-detail", "async-pizza-detail", False),
+    "GET ingredient-list-create": (
+        "ingredient-list-create",
+        "async-ingredient-list",
+        True,
+    ),
+}
+
+
+async def timed_get(client, url, headers):
+    start = time.perf_counter()
+    response = await client.get(url, headers=headers)
+    assert response.status_code < 500, response.status_code
+    return (time.perf_counter() - start) * 1000
+
+
+async def run_rounds(url, headers, rounds, concurrency):
+    client = AsyncClient()
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(rounds):
+        latencies += await asyncio.gather(
+            *(timed_get(client, url, headers) for _ in range(concurrency))
+        )
+    return latencies, time.perf_counter() - start
+
+
+def measure_concurrent(url, headers, rounds=ITERATIONS, concurrency=CONCURRENCY):
+    """Summarize per-request latency and throughput of concurrent GETs."""
+    with CaptureQueriesContext(connection) as captured:
+        latencies, elapsed = async_to_sync(run_rounds)(
+            url, headers, rounds, concurrency
+        )
+
+    ordered = sorted(latencies)
+    return {
+        "iterations": len(latencies),
+        "concurrency": concurrency,
+        "requests_per_s": round(len(latencies) / elapsed, 1),
+        "mean_ms": round(statistics.fmean(latencies), 3),
+        "p50_ms": round(percentile(ordered, 0.50), 3),
+        "p90_ms": round(percentile(ordered, 0.90), 3),
+        "p99_ms": round(percentile(ordered, 0.99), 3),
+        "max_ms": round(ordered[-1], 3),
+        "queries": round(len(captured.captured_queries) / len(latencies), 1),
+    }
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+@pytest.mark.parametrize("route", READ_ROUTES)
+def test_concurrent_reads(route, mode, catalog, benchmark_report):
+    sync_name, async_name, staff_only = READ_ROUTES[route]
+    name = sync_name if mode == "sync" else async_name
+    args = []
+    if name.endswith("detail"):
+        args = [catalog.pizza_ids[len(catalog.pizza_ids) // 2]]
+    headers = {"Authorization": f"Token {catalog.token}"} if staff_only else {}
+
+    result = measure_concurrent(reverse(name, args=args), headers)
+    key = f"{route} x{CONCURRENCY} ({mode})"
+    benchmark_report["results"].setdefault(str(catalog.size), {})[key] = result
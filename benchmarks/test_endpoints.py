@@ -0,0 +1,304 @@
+"""
+Latency and query-count benchmarks for every pizzeria and authentication route.
+
+Opt-in: ``pytest -m benchmark benchmarks/``. See ``benchmarks/conftest.py`` for
+the environment variables controlling catalog sizes and iterations.
+"""
+
+import itertools
+
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from pizzeria.models import Ingredient
+
+from .conftest import ITERATIONS, PASSWORD, measure
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+
+def staff_client(catalog):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Token {catalog.token}")
+    return client
+
+
+def pizza_list_anonymous(catalog):
+    client = APIClient()
+    return lambda: client.get(reverse("pizza-list"))
+
+
+def pizza_list_staff(catalog):
+    client = staff_client(catalog)
+    return lambda: client.get(reverse("pizza-list"))
+
+
+def pizza_list_sparse(catalog):
+    client = APIClient()
+    return lambda: client.get(f"{reverse('pizza-list')}?fields=name,price")
+
+
+def pizza_list_expanded(catalog):
+    client = APIClient()
+    return lambda: client.get(f"{reverse('pizza-list')}?expand=ingredients")
+
+
+def pizza_list_ingredient_filter(use_index):
+    def route(catalog):
+        client = APIClient()
+        ids = catalog.ingredient_ids
+        url = (
+            f"{reverse('pizza-list')}?ingredients_all={ids[0]}"
+            f"&ingredients_any={ids[1]},{ids[2]},{ids[3]}&ingredients_exclude={ids[4]}"
+        )
+
+        def call():
+            with override_settings(PIZZERIA_INGREDIENT_INDEX=use_index):
+                return client.get(url)
+
+        return call
+
+    return route
+
+
+def pizza_facets(catalog):
+    client = APIClient()
+    return lambda: client.get(reverse("pizza-facets"))
+
+
+def pizza_detail(catalog):
+    client = APIClient()
+    url = reverse("pizza-detail", args=[catalog.pizza_ids[len(catalog.pizza_ids) // 2]])
+    return lambda: client.get(url)
+
+
+def pizza_create(catalog):
+    client = staff_client(catalog)
+    counter = itertools.count()
+    return lambda: client.post(
+        reverse("pizza-create"),
+        {
+            "name": f"Benchmark {next(counter)}",
+            "price": "12.50",
+            "status": "active",
+            "ingredients": catalog.ingredient_ids[:10],
+        },
+        format="json",
+    )
+
+
+def pizza_bulk_upsert(catalog):
+    client = staff_client(catalog)
+    payload = [
+        {
+            "name": f"Pizza {i}",
+            "price": "9.99",
+            "ingredients": catalog.ingredient_ids[:8],
+        }
+        for i in range(50)
+    ]
+    return lambda: client.post(reverse("pizza-bulk-upsert"), payload, format="json")
+
+
+def pizza_update_get(catalog):
+    client = staff_client(catalog)
+    url = reverse("pizza-update", args=[catalog.pizza_ids[0]])
+    return lambda: client.get(url)
+
+
+def pizza_update_put(catalog):
+    client = staff_client(catalog)
+    url = reverse("pizza-update", args=[catalog.pizza_ids[0]])
+    payload = {
+        "name": "Pizza 0",
+        "price": "10.00",
+        "status": "active",
+        "ingredients": catalog.ingredient_ids[:6],
+    }
+    return lambda: client.put(url, payload, format="json")
+
+
+def pizza_update_swap_ingredient(catalog):
+    client = staff_client(catalog)
+    url = reverse("pizza-update", args=[catalog.pizza_ids[1]])
+    base = catalog.ingredient_ids[:5]
+    swaps = itertools.cycle(catalog.ingredient_ids[5:7])
+    return lambda: client.patch(
+        url, {"ingredients": [*base, next(swaps)]}, format="json"
+    )
+
+
+def pizza_add_ingredient(catalog):
+    client = staff_client(catalog)
+    url = reverse(
+        "pizza-add-ingredient", args=[catalog.pizza_ids[0], catalog.ingredient_ids[-1]]
+    )
+    return lambda: client.post(url)
+
+
+def pizza_remove_ingredient(catalog):
+    client = staff_client(catalog)
+    url = reverse(
+        "pizza-remove-ingredient",
+        args=[catalog.pizza_ids[0], catalog.ingredient_ids[-1]],
+    )
+    return lambda: client.delete(url)
+
+
+def pizza_ingredients_batch(catalog):
+    client = staff_client(catalog)
+    url = reverse("pizza-ingredients-batch", args=[catalog.pizza_ids[0]])
+    payload = {
+        "add": catalog.ingredient_ids[:12],
+        "remove": catalog.ingredient_ids[12:15],
+    }
+    return lambda: client.post(url, payload, format="json")
+
+
+def pizza_export(export_format):
+    def route(catalog):
+        client = staff_client(catalog)
+        url = reverse("pizza-export", args=[export_format])
+
+        def call():
+            response = client.get(url)
+            # Drain the stream so the measurement covers the whole export.
+            for _ in response.streaming_content:
+                pass
+            return response
+
+        return call
+
+    return route
+
+
+def ingredient_list(catalog):
+    client = staff_client(catalog)
+    return lambda: client.get(reverse("ingredient-list-create"))
+
+
+def ingredient_create(catalog):
+    client = staff_client(catalog)
+    counter = itertools.count()
+    return lambda: client.post(
+        reverse("ingredient-list-create"),
+        {"name": f"Benchmark {next(counter)}", "category": "basic"},
+        format="json",
+    )
+
+
+def ingredient_detail_get(catalog):
+    client = staff_client(catalog)
+    url = reverse("ingredient-detail-update-destroy", args=[catalog.ingredient_ids[0]])
+    return lambda: client.get(url)
+
+
+def ingredient_detail_put(catalog):
+    client = staff_client(catalog)
+    url = reverse("ingredient-detail-update-destroy", args=[catalog.ingredient_ids[0]])
+    payload = {"name": "Ingredient 0", "category": "premium"}
+    return lambda: client.put(url, payload, format="json")
+
+
+def ingredient_detail_delete(catalog):
+    client = staff_client(catalog)
+    unused = iter(
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f"Unused {i}") for i in range(ITERATIONS)
+        )
+    )
+    return lambda: client.delete(
+        reverse("ingredient-detail-update-destroy", args=[next(unused).pk])
+    )
+
+
+def async_pizza_list(catalog):
+    client = APIClient()
+    return lambda: client.get(reverse("async-pizza-list"))
+
+
+def async_pizza_detail(catalog):
+    client = APIClient()
+    url = reverse(
+        "async-pizza-detail", args=[catalog.pizza_ids[len(catalog.pizza_ids) // 2]]
+    )
+    return lambda: client.get(url)
+
+
+def async_ingredient_list(catalog):
+    client = staff_client(catalog)
+    return lambda: client.get(reverse("async-ingredient-list"))
+
+
+def token_obtain_pair(catalog):
+    client = APIClient()
+    payload = {"username": catalog.staff.username, "password": PASSWORD}
+    return lambda: client.post(reverse("token_obtain_pair"), payload, format="json")
+
+
+def token_refresh(catalog):
+    client = APIClient()
+    # Rotation blacklists every refresh token after use, so each call needs
+    # a fresh one.
+    tokens = iter(
+        [str(RefreshToken.for_user(catalog.staff)) for _ in range(ITERATIONS)]
+    )
+    return lambda: client.post(
+        reverse("token_refresh"), {"refresh": next(tokens)}, format="json"
+    )
+
+
+def token_verify(catalog):
+    client = APIClient()
+    payload = {"token": str(RefreshToken.for_user(catalog.staff).access_token)}
+    return lambda: client.post(reverse("token_verify"), payload, format="json")
+
+
+ROUTES = {
+    "GET pizza-list (anonymous)": pizza_list_anonymous,
+    "GET pizza-list (staff)": pizza_list_staff,
+    "GET pizza-list (fields=name,price)": pizza_list_sparse,
+    "GET pizza-list (expand=ingredients)": pizza_list_expanded,
+    "GET pizza-list (ingredient filter, index)": pizza_list_ingredient_filter(True),
+    "GET pizza-list (ingredient filter, database)": pizza_list_ingredient_filter(False),
+    "GET pizza-facets": pizza_facets,
+    "GET pizza-detail": pizza_detail,
+    "POST pizza-create": pizza_create,
+    "POST pizza-bulk-upsert": pizza_bulk_upsert,
+    "GET pizza-export (ndjson)": pizza_export("ndjson"),
+    "GET pizza-export (csv)": pizza_export("csv"),
+    "GET pizza-update": pizza_update_get,
+    "PUT pizza-update": pizza_update_put,
+    "PATCH pizza-update (swap one ingredient)": pizza_update_swap_ingredient,
+    "POST pizza-add-ingredient": pizza_add_ingredient,
+    "DELETE pizza-remove-ingredient": pizza_remove_ingredient,
+    "POST pizza-ingredients-batch": pizza_ingredients_batch,
+    "GET ingredient-list-create": ingredient_list,
+    "POST ingredient-list-create": ingredient_create,
+    "GET ingredient-detail-update-destroy": ingredient_detail_get,
+    "PUT ingredient-detail-update-destroy": ingredient_detail_put,
+    "DELETE ingredient-detail-update-destroy": ingredient_detail_delete,
+    "GET async-pizza-list": async_pizza_list,
+    "GET async-pizza-detail": async_pizza_detail,
+    "GET async-ingredient-list": async_ingredient_list,
+    "POST token_obtain_pair": token_obtain_pair,
+    "POST token_refresh": token_refresh,
+    "POST token_verify": token_verify,
+}
+
+
+@pytest.mark.parametrize("route", ROUTES)
+def test_endpoint(route, catalog, benchmark_report):
+    result = measure(ROUTES[route](catalog))
+    benchmark_report["results"].setdefault(str(catalog.size), {})[route] = result
+
+
+def test_every_route_is_benchmarked():
+    from authentication.urls import urlpatterns as authentication_patterns
+    from pizzeria.urls import urlpatterns as pizzeria_patterns
+
+    names = {pattern.name for pattern in pizzeria_patterns + authentication_patterns}
+    assert names == {route.split()[1] for route in ROUTES}
@@ -0,0 +1,42 @@
+"""
+Rows-per-second benchmarks of the serializer and ``values()`` list paths.
+
+Each list route is read at the maximum page size with ``PIZZERIA_FAST_READS``
+off and on; results land in the same report as ``test_endpoints.py`` under
+``"<route> (serializer|values)"`` with an extra ``rows_per_s`` figure.
+"""
+
+import pytest
+from django.conf import settings
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .conftest import measure
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+LIST_ROUTES = {
+    "GET pizza-list": ("pizza-list", False),
+    "GET async-pizza-list": ("async-pizza-list", False),
+    "GET ingredient-list-create": ("ingredient-list-create", True),
+}
+
+
+@pytest.mark.parametrize("fast", [False, True], ids=["serializer", "values"])
+@pytest.mark.parametrize("route", LIST_ROUTES)
+def test_list_rows_per_second(route, fast, catalog, benchmark_report):
+    name, staff_only = LIST_ROUTES[route]
+    client = APIClient()
+    if staff_only:
+        client.credentials(HTTP_AUTHORIZATION=f"Token {catalog.token}")
+    url = f"{reverse(name)}?page_size={settings.PIZZERIA_MAX_PAGE_SIZE}"
+
+    with override_settings(PIZZERIA_FAST_READS=fast):
+        rows = len(client.get(url).json()["results"])
+        result = measure(lambda: client.get(url))
+    result["rows"] = rows
+    result["rows_per_s"] = round(rows / (result["mean_ms"] / 1000), 1)
+
+    key = f"{route} ({'values' if fast else 'serializer'})"
+    benchmark_report["results"].setdefault(str(catalog.size), {})[key] = result
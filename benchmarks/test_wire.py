@@ -0,0 +1,62 @@
+"""
+Bytes-on-the-wire and encode-time benchmarks for the API renderers.
+
+A full pizza list page (``PIZZERIA_MAX_PAGE_SIZE`` rows) is encoded with
+the stock DRF JSON renderer, the orjson renderer and MessagePack, then
+gzipped the way ``CompressionMiddleware`` does it. Results land in the same
+report as ``test_endpoints.py`` under ``"GET pizza-list (<format>)"``.
+"""
+
+import statistics
+import time
+
+import pytest
+from django.conf import settings
+from django.urls import reverse
+from django.utils.text import compress_string
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from myproject.renderers import FastJSONRenderer, MessagePackRenderer
+
+from .conftest import ITERATIONS, percentile
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+RENDERERS = {
+    "json": JSONRenderer,
+    "orjson": FastJSONRenderer,
+    "msgpack": MessagePackRenderer,
+}
+
+
+def timed(call, iterations=ITERATIONS):
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        result = call()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return result, sorted(latencies)
+
+
+@pytest.mark.parametrize("renderer", RENDERERS)
+def test_pizza_list_encoding(renderer, catalog, benchmark_report):
+    client = APIClient()
+    url = f"{reverse('pizza-list')}?page_size={settings.PIZZERIA_MAX_PAGE_SIZE}"
+    data = client.get(url).data
+    render = RENDERERS[renderer]().render
+
+    body, encode = timed(lambda: render(data, renderer_context={}))
+    compressed, compress = timed(lambda: compress_string(body))
+    result = {
+        "iterations": ITERATIONS,
+        "rows": len(data["results"]),
+        "bytes": len(body),
+        "gzip_bytes": len(compressed),
+        "encode_mean_ms": round(statistics.fmean(encode), 3),
+        "encode_p50_ms": round(percentile(encode, 0.50), 3),
+        "gzip_mean_ms": round(statistics.fmean(compress), 3),
+    }
+
+    key = f"GET pizza-list ({renderer})"
+    benchmark_report["results"].setdefault(str(catalog.size), {})[key] = result
@@ -0,0 +1,13 @@
+import pytest
+from django.core.cache import caches
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Fixture to start every test with empty caches."""
+    from authentication.authentication import token_cache
+
+    for cache in caches.all():
+        cache.clear()
+    token_cache.clear()
+    yield
@@ -1,51 +1,93 @@
+import argparse
 import os
 import django
 from django.contrib.auth import get_user_model
 
+from authentication.provisioning import provision_users, read_users
+
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "myproject.settings")
 django.setup()
 
 User = get_user_model()
 
-superuser_username = os.environ.get("DJANGO_SUPERUSER_USERNAME")
-superuser_email = os.environ.get("DJANGO_SUPERUSER_EMAIL")
-superuser_password = os.environ.get("DJANGO_SUPERUSER_PASSWORD")
 
-if not User.objects.filter(username=superuser_username).exists():
-    User.objects.create_superuser(
-        username=superuser_username, email=superuser_email, password=superuser_password
-    )
-    print(f"Superuser '{superuser_username}' created.")
-else:
-    print(f"Superuser '{superuser_username}' already exists.")
+def create_default_users():
+    superuser_username = os.environ.get("DJANGO_SUPERUSER_USERNAME")
+    superuser_email = os.environ.get("DJANGO_SUPERUSER_EMAIL")
+    superuser_password = os.environ.get("DJANGO_SUPERUSER_PASSWORD")
+
+    if not User.objects.filter(username=superuser_username).exists():
+        User.objects.create_superuser(
+            username=superuser_username,
+            email=superuser_email,
+            password=superuser_password,
+        )
+        print(f"Superuser '{superuser_username}' created.")
+    else:
+        print(f"Superuser '{superuser_username}' already exists.")
 
-staff_username = os.environ.get("DJANGO_STAFF_USERNAME")
-staff_password = os.environ.get("DJANGO_STAFF_PASSWORD")
+    staff_username = os.environ.get("DJANGO_STAFF_USERNAME")
+    staff_password = os.environ.get("DJANGO_STAFF_PASSWORD")
 
-if staff_username and staff_password:
-    if not User.objects.filter(username=staff_username).exists():
-        User.objects.create_user(
-            username=staff_username, password=staff_password, is_staff=True
+    if staff_username and staff_password:
+        if not User.objects.filter(username=staff_username).exists():
+            User.objects.create_user(
+                username=staff_username, password=staff_password, is_staff=True
+            )
+            print(f"Staff user '{staff_username}' created.")
+        else:
+            print(f"Staff user '{staff_username}' already exists.")
+    else:
+        print(
+            "Skipping staff user creation: DJANGO_STAFF_USERNAME or DJANGO_STAFF_PASSWORD not set."
         )
-        print(f"Staff user '{staff_username}' created.")
+
+    normal_username = os.environ.get("DJANGO_NORMAL_USERNAME")
+    normal_password = os.environ.get("DJANGO_NORMAL_PASSWORD")
+
+    if normal_username and normal_password:
+        if not User.objects.filter(username=normal_username).exists():
+            User.objects.create_user(username=normal_username, password=normal_password)
+            print(f"Regular user '{normal_username}' created.")
+        else:
+            print(f"Regular user '{normal_username}' already exists.")
     else:
-        print(f"Staff user '{staff_username}' already exists.")
-else:
+        print(
+            "Skipping regular user creation: DJANGO_NORMAL_USERNAME or DJANGO_NORMAL_PASSWORD not set."
+        )
+
+
+def provision_from_file(path, workers, batch_size):
+    result = provision_users(read_users(path), workers=workers, batch_size=batch_size)
     print(
-        "Skipping staff user creation: DJANGO_STAFF_USERNAME or DJANGO_STAFF_PASSWORD not set."
+        "Created {created} user(s), {existing} already existed, {skipped} row(s) "
+        "skipped; {seconds:.2f}s total, {hashing_seconds:.2f}s hashing, "
+        "{users_per_second:.0f} users/s.".format(**result)
     )
 
 
-normal_username = os.environ.get("DJANGO_NORMAL_USERNAME")
-normal_password = os.environ.get("DJANGO_NORMAL_PASSWORD")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Create the default users from the environment, or provision "
+        "users in bulk from a CSV/JSON file."
+    )
+    parser.add_argument(
+        "--file",
+        help="CSV or JSON file with username, email, password, is_staff and "
+        "is_superuser.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Processes used to hash passwords (default: CPU count).",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=1000, help="Users per INSERT statement."
+    )
+    args = parser.parse_args()
 
-if normal_username and normal_password:
-    if not User.objects.filter(username=normal_username).exists():
-        User.objects.create_user(username=normal_username, password=normal_password)
-        print(f"Regular user '{normal_username}' created.")
+    if args.file:
+        provision_from_file(args.file, args.workers, args.batch_size)
     else:
-        print(f"Regular user '{normal_username}' already exists.")
-else:
-    print(
-        "Skipping regular user creation: DJANGO_NORMAL_USERNAME or DJANGO_NORMAL_PASSWORD not set."
-    )
+        create_default_users()
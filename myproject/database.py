@@ -0,0 +1,23 @@
+import os
+
+
+def pool_options(environ=os.environ, health_checks=True):
+    """
+    Return the psycopg 3 pool options (``OPTIONS["pool"]``) from ``DB_POOL_*``.
+
+    Django skips its ``CONN_HEALTH_CHECKS`` for pooled connections, and the
+    pool only checks a connection on checkout when given a ``check``
+    callback, so ``health_checks`` sets one.
+    """
+    options = {
+        "min_size": int(environ.get("DB_POOL_MIN_SIZE", 2)),
+        "max_size": int(environ.get("DB_POOL_MAX_SIZE", 10)),
+        "timeout": float(environ.get("DB_POOL_TIMEOUT", 10)),
+        "max_idle": float(environ.get("DB_POOL_MAX_IDLE", 300)),
+        "max_lifetime": float(environ.get("DB_POOL_MAX_LIFETIME", 3600)),
+    }
+    if health_checks:
+        from psycopg_pool import ConnectionPool
+
+        options["check"] = ConnectionPool.check_connection
+    return options
@@ -0,0 +1,189 @@
+import functools
+import json
+import logging
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.middleware.gzip import GZipMiddleware
+from rest_framework import serializers
+
+logger = logging.getLogger("myproject.server_timing")
+
+_current_timings = ContextVar("server_timings", default=None)
+
+
+class RequestTimings:
+    """Per-request counters filled by the instrumentation hooks."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.serializer = 0.0
+        self.serializer_depth = 0
+
+
+def _time_queries(execute, sql, params, many, context):
+    timings = _current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries += 1
+        timings.db += time.perf_counter() - start
+
+
+def _install_query_timer(connection, **kwargs):
+    if _time_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_queries)
+
+
+POOL_METRICS = {
+    "checkouts": "requests_num",
+    "waits": "requests_queued",
+    "wait_ms": "requests_wait_ms",
+    "timeouts": "requests_errors",
+    "size": "pool_size",
+    "available": "pool_available",
+    "connections_lost": "connections_lost",
+}
+
+
+def pool_stats(alias="default"):
+    """
+    Return checkout, wait and timeout counters of the alias's connection pool.
+
+    Counters are per process and cumulative. ``None`` when the alias is not
+    pooled (SQLite, or PostgreSQL without ``DB_POOL``).
+    """
+    pool = getattr(connections[alias], "pool", None)
+    if pool is None:
+        return None
+    stats = pool.get_stats()
+    return {name: stats.get(key, 0) for name, key in POOL_METRICS.items()}
+
+
+def _time_serializer(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        timings = _current_timings.get()
+        if timings is None or timings.serializer_depth:
+            return func(*args, **kwargs)
+        timings.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            timings.serializer += time.perf_counter() - start
+            timings.serializer_depth -= 1
+
+    wrapper.server_timing = True
+    return wrapper
+
+
+def _instrument_serializers():
+    base, many = serializers.BaseSerializer, serializers.ListSerializer
+    if getattr(base.is_valid, "server_timing", False):
+        return
+    base.is_valid = _time_serializer(base.is_valid)
+    many.is_valid = _time_serializer(many.is_valid)
+    base.data = property(_time_serializer(base.data.fget))
+
+
+class ServerTimingMiddleware:
+    """
+    Report SQL query count, DB time, serializer time and total time.
+
+    The numbers go out in a ``Server-Timing`` header and, with
+    ``SERVER_TIMING_LOG``, as a JSON log line on ``myproject.server_timing``
+    that also carries the connection pool counters when pooling is enabled.
+    When ``SERVER_TIMING_ENABLED`` is off the middleware removes itself from
+    the chain and no hooks are installed.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+        connection_created.connect(_install_query_timer)
+        for connection in connections.all(initialized_only=True):
+            _install_query_timer(connection)
+        _instrument_serializers()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_timings.reset(token)
+        return self.process_timings(request, response, timings, start)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_timings.reset(token)
+        return self.process_timings(request, response, timings, start)
+
+    def process_timings(self, request, response, timings, start):
+        total = time.perf_counter() - start
+        response["Server-Timing"] = ", ".join(
+            [
+                f'db;dur={timings.db * 1000:.2f};desc="{timings.queries} queries"',
+                f"serializer;dur={timings.serializer * 1000:.2f}",
+                f"total;dur={total * 1000:.2f}",
+            ]
+        )
+        if settings.SERVER_TIMING_LOG:
+            entry = {
+                "method": request.method,
+                "path": request.path,
+                "status": response.status_code,
+                "queries": timings.queries,
+                "db_ms": round(timings.db * 1000, 3),
+                "serializer_ms": round(timings.serializer * 1000, 3),
+                "total_ms": round(total * 1000, 3),
+            }
+            stats = pool_stats()
+            if stats is not None:
+                entry["db_pool"] = stats
+            logger.info(json.dumps(entry))
+        return response
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Gzip responses of at least ``COMPRESSION_MIN_LENGTH`` bytes.
+
+    Django's ``GZipMiddleware`` (Accept-Encoding negotiation, Vary, ETag
+    weakening and BREACH padding) with a configurable threshold, since small
+    bodies gain less than the CPU time they cost. Streaming responses are
+    always compressed.
+    """
+
+    def process_response(self, request, response):
+        if (
+            not response.streaming
+            and len(response.content) < settings.COMPRESSION_MIN_LENGTH
+        ):
+            return response
+        return super().process_response(request, response)
@@ -0,0 +1,156 @@
+import functools
+import hashlib
+import json
+
+import drf_yasg
+import rest_framework
+from django.conf import settings
+from django.http import HttpResponse
+from django.urls import get_resolver
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from drf_yasg import openapi
+from drf_yasg.codecs import yaml_dump
+from drf_yasg.renderers import ReDocRenderer, SwaggerUIRenderer
+from drf_yasg.views import get_schema_view
+from rest_framework import permissions
+
+from .serving import iter_patterns, view_class
+
+API_INFO = openapi.Info(
+    title="Pizzeria API",
+    default_version="v1",
+    description="API para gestionar pedidos de una pizzería",
+    terms_of_service="https://www.google.com/policies/terms/",
+    contact=openapi.Contact(email="contact@pizzeria.local"),
+    license=openapi.License(name="BSD License"),
+)
+
+schema_view = get_schema_view(
+    API_INFO,
+    public=True,
+    permission_classes=(permissions.AllowAny,),
+)
+
+
+class CachedSchema:
+    """An OpenAPI document encoded once and kept in memory."""
+
+    def __init__(self, fingerprint, spec, source):
+        self.fingerprint = fingerprint
+        self.source = source
+        self.bodies = {
+            "json": json.dumps(spec, ensure_ascii=False).encode(),
+            "yaml": yaml_dump(spec, binary=True),
+        }
+
+    def etag(self, encoding):
+        return quote_etag(f"{self.fingerprint[:32]}-{encoding}")
+
+
+def schema_fingerprint():
+    """
+    Hash everything the generated schema depends on.
+
+    That is the URLconf (routes and their views, including docstrings and
+    allowed methods), each view's serializer fields, the API info, the
+    drf_yasg settings and the library versions.
+    """
+    digest = hashlib.sha256()
+    parts = [
+        drf_yasg.__version__,
+        rest_framework.VERSION,
+        json.dumps(API_INFO, sort_keys=True),
+        repr(sorted(getattr(settings, "SWAGGER_SETTINGS", {}).items())),
+    ]
+    for route, pattern in iter_patterns(get_resolver().url_patterns):
+        callback = pattern.callback
+        cls = view_class(callback)
+        parts += [route, f"{callback.__module__}.{callback.__qualname__}"]
+        if cls is not None:
+            parts += [
+                cls.__doc__ or "",
+                repr(getattr(cls, "http_method_names", [])),
+                repr(getattr(cls, "pagination_class", None)),
+            ]
+            serializer_class = getattr(cls, "serializer_class", None)
+            if serializer_class is not None:
+                parts.append(repr(serializer_class()))
+    for part in parts:
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def generate_schema():
+    """Walk every view and serializer with drf_yasg and return the document."""
+    generator = schema_view.generator_class(API_INFO)
+    swagger = generator.get_schema(request=None, public=True)
+    # Round-trip through JSON so the result is plain dicts and lists.
+    return json.loads(json.dumps(swagger.as_dict()))
+
+
+def write_schema(path=None):
+    """Generate the schema and store it with its fingerprint."""
+    path = path or settings.OPENAPI_SCHEMA_FILE
+    fingerprint = schema_fingerprint()
+    spec = generate_schema()
+    with open(path, "w") as schema_file:
+        json.dump({"fingerprint": fingerprint, "schema": spec}, schema_file)
+    return CachedSchema(fingerprint, spec, source=str(path))
+
+
+def load_schema(path=None, fingerprint=None):
+    """Read a stored schema, or ``None`` if it is missing or stale."""
+    path = path or settings.OPENAPI_SCHEMA_FILE
+    fingerprint = fingerprint or schema_fingerprint()
+    try:
+        with open(path) as schema_file:
+            stored = json.load(schema_file)
+    except (OSError, ValueError):
+        return None
+    if stored.get("fingerprint") != fingerprint:
+        return None
+    return CachedSchema(fingerprint, stored["schema"], source=str(path))
+
+
+@functools.lru_cache(maxsize=None)
+def get_schema():
+    """
+    Return the process-wide schema.
+
+    Uses the file written by ``generate_openapi_schema`` when it matches the
+    current URLconf and serializers, otherwise generates it once in memory.
+    """
+    fingerprint = schema_fingerprint()
+    schema = load_schema(fingerprint=fingerprint)
+    if schema is None:
+        schema = CachedSchema(fingerprint, generate_schema(), source="generated")
+    return schema
+
+
+class CachedSchemaView(schema_view):
+    """
+    Serve the schema from memory with an ETag.
+
+    The swagger-ui and ReDoc pages are still rendered by drf_yasg, which
+    builds them from an empty pattern list; every request for the document
+    itself is answered from ``get_schema()``.
+    """
+
+    def get(self, request, version="", format=None):
+        renderer = request.accepted_renderer
+        if isinstance(renderer, (SwaggerUIRenderer, ReDocRenderer)):
+            return super().get(request, version, format)
+
+        schema = get_schema()
+        encoding = "yaml" if "yaml" in renderer.media_type else "json"
+        etag = schema.etag(encoding)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(
+                schema.bodies[encoding],
+                content_type=f"{renderer.media_type}; charset=utf-8",
+            )
+        response["ETag"] = etag
+        return response
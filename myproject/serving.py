@@ -0,0 +1,129 @@
+import socket
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.staticfiles.handlers import StaticFilesHandler
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.urls import URLResolver, get_resolver
+
+
+def iter_patterns(patterns, prefix=""):
+    """Yield ``(route, pattern)`` for every URL pattern, nested ones included."""
+    for pattern in patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            yield from iter_patterns(pattern.url_patterns, route)
+        else:
+            yield route, pattern
+
+
+def view_class(callback):
+    """The class behind a view function, if any."""
+    # Django's as_view() sets ``view_class``; DRF's function views set ``cls``.
+    return getattr(callback, "view_class", None) or getattr(callback, "cls", None)
+
+
+def is_process_local_cache(alias):
+    """Whether the cache ``alias`` lives in each process's own memory."""
+    return isinstance(caches[alias], LocMemCache)
+
+
+def get_application():
+    """The WSGI handler, serving static files under ``DEBUG`` like runserver."""
+    application = get_wsgi_application()
+    if settings.DEBUG and apps.is_installed("django.contrib.staticfiles"):
+        return StaticFilesHandler(application)
+    return application
+
+
+def warm_up(connect=True):
+    """
+    Do the work the first request would otherwise pay for.
+
+    Builds the WSGI handler (middleware chain), populates the URL resolver
+    (importing every view and compiling every pattern), constructs the fields
+    of every view's serializer and, with ``connect``, opens the database
+    connections. Returns the counts and the elapsed seconds.
+    """
+    start = time.perf_counter()
+    application = get_application()
+
+    resolver = get_resolver()
+    resolver.reverse_dict
+    patterns = [pattern for _, pattern in iter_patterns(resolver.url_patterns)]
+
+    serializers = set()
+    for pattern in patterns:
+        cls = view_class(pattern.callback)
+        serializer_class = getattr(cls, "serializer_class", None)
+        if serializer_class is not None and serializer_class not in serializers:
+            serializer_class().fields
+            serializers.add(serializer_class)
+
+    opened = 0
+    if connect:
+        for connection in connections.all():
+            connection.ensure_connection()
+            opened += 1
+
+    return {
+        "application": application,
+        "patterns": len(patterns),
+        "serializers": len(serializers),
+        "connections": opened,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+class SharedSocketWSGIServer(ThreadedWSGIServer):
+    """
+    Django's threaded WSGI server accepting on an already bound socket.
+
+    Each connection gets its own daemon thread, as under ``runserver``, so a
+    long export stream does not hold up the worker's other clients. Database
+    connections are closed when the connection's thread finishes.
+    """
+
+    def __init__(self, sock, application):
+        super().__init__(
+            sock.getsockname(), WSGIRequestHandler, bind_and_activate=False
+        )
+        self.socket.close()
+        self.socket = sock
+        self.address_family = sock.family
+        self.server_address = sock.getsockname()
+        host, port = self.server_address[:2]
+        self.server_name = socket.getfqdn(host)
+        self.server_port = port
+        self.setup_environ()
+        self.set_app(application)
+
+
+def measure_ttfb(address, path, host="localhost", timeout=30):
+    """
+    Send one GET to ``address`` and time the first byte of the response.
+
+    Returns ``(status_code, seconds)``.
+    """
+    request = (
+        f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n"
+    ).encode()
+    with socket.create_connection(address, timeout=timeout) as client:
+        start = time.perf_counter()
+        client.sendall(request)
+        first = client.recv(1)
+        elapsed = time.perf_counter() - start
+        response = first
+        while first:
+            chunk = client.recv(65536)
+            if not chunk:
+                break
+            response += chunk
+    head = response.split(b"\r\n", 1)[0]
+    status_code = int(head.split(b" ", 2)[1]) if b" " in head else 0
+    return status_code, elapsed
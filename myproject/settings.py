@@ -3,6 +3,8 @@ from pathlib import Path
 from datetime import timedelta
 from dotenv import load_dotenv
 
+from myproject import database
+
 load_dotenv()
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -27,6 +29,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "myproject.middleware.ServerTimingMiddleware",
+    "myproject.middleware.CompressionMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -62,10 +66,20 @@ try:
 except ImportError:
     dj_database_url = None
 
+# Persistent connections are kept for DB_CONN_MAX_AGE seconds and, with health
+# checks, pinged before reuse so a restarted database does not fail requests.
+DB_CONN_MAX_AGE = int(os.environ.get("DB_CONN_MAX_AGE", 600))
+DB_CONN_HEALTH_CHECKS = (
+    os.environ.get("DB_CONN_HEALTH_CHECKS", "true").lower() == "true"
+)
+
 if DATABASE_URL and dj_database_url:
     DATABASES = {
         "default": dj_database_url.parse(
-            DATABASE_URL, conn_max_age=600, ssl_require=False
+            DATABASE_URL,
+            conn_max_age=DB_CONN_MAX_AGE,
+            conn_health_checks=DB_CONN_HEALTH_CHECKS,
+            ssl_require=False,
         )
     }
 else:
@@ -73,12 +87,33 @@ else:
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
             "NAME": BASE_DIR / "db.sqlite3",
+            "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": DB_CONN_HEALTH_CHECKS,
         }
     }
 
+# psycopg 3 connection pool for PostgreSQL. It replaces persistent connections;
+# with DB_CONN_HEALTH_CHECKS the pool checks each connection on checkout.
+if (
+    os.environ.get("DB_POOL", "").lower() == "true"
+    and DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql"
+):
+    pool_options = database.pool_options(health_checks=DB_CONN_HEALTH_CHECKS)
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"].setdefault("OPTIONS", {})["pool"] = pool_options
+
 if os.getenv("PYTEST_CURRENT_TEST") or os.getenv("GITHUB_ACTIONS"):
     DATABASES["default"]["NAME"] = ":memory:"
 
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", ""),
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -94,6 +129,15 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "myproject.server_timing": {"handlers": ["console"], "level": "INFO"},
+    },
+}
+
 LANGUAGE_CODE = "en-us"
 TIME_ZONE = "UTC"
 USE_I18N = True
@@ -104,9 +148,20 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework.authentication.TokenAuthentication",
+        "authentication.authentication.CachedTokenAuthentication",
         "rest_framework_simplejwt.authentication.JWTAuthentication",
-    )
+    ),
+    "DEFAULT_RENDERER_CLASSES": [
+        "myproject.renderers.FastJSONRenderer",
+        "myproject.renderers.MessagePackRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+}
+
+TOKEN_AUTH_CACHE = {
+    "TTL": int(os.environ.get("TOKEN_AUTH_CACHE_TTL", 60)),
+    "MAX_SIZE": int(os.environ.get("TOKEN_AUTH_CACHE_MAX_SIZE", 10000)),
+    "CACHE_ALIAS": os.environ.get("TOKEN_AUTH_CACHE_ALIAS") or None,
 }
 
 SIMPLE_JWT = {
@@ -116,3 +171,49 @@ SIMPLE_JWT = {
     "BLACKLIST_AFTER_ROTATION": True,
     "UPDATE_LAST_LOGIN": True,
 }
+
+# Default batch size of ``manage.py prune_tokens``.
+TOKEN_PRUNE_BATCH_SIZE = int(os.environ.get("TOKEN_PRUNE_BATCH_SIZE", 1000))
+
+PIZZERIA_CACHE_ALIAS = os.environ.get("PIZZERIA_CACHE_ALIAS", "default")
+PIZZERIA_DETAIL_CACHE_TIMEOUT = int(
+    os.environ.get("PIZZERIA_DETAIL_CACHE_TIMEOUT", 300)
+)
+PIZZERIA_PAGE_SIZE = int(os.environ.get("PIZZERIA_PAGE_SIZE", 50))
+PIZZERIA_MAX_PAGE_SIZE = int(os.environ.get("PIZZERIA_MAX_PAGE_SIZE", 500))
+PIZZERIA_BULK_MAX_ITEMS = int(os.environ.get("PIZZERIA_BULK_MAX_ITEMS", 1000))
+PIZZERIA_EXPORT_CHUNK_SIZE = int(os.environ.get("PIZZERIA_EXPORT_CHUNK_SIZE", 1000))
+PIZZERIA_FACETS_CACHE_TIMEOUT = int(
+    os.environ.get("PIZZERIA_FACETS_CACHE_TIMEOUT", 3600)
+)
+# Prices where one bucket of /api/pizzas/facets/ ends and the next begins.
+PIZZERIA_FACET_PRICE_BUCKETS = [
+    value.strip()
+    for value in os.environ.get("PIZZERIA_FACET_PRICE_BUCKETS", "10,15,20").split(",")
+    if value.strip()
+]
+# Render pizza and ingredient list pages from values() rows instead of
+# serializers; the output is identical.
+PIZZERIA_FAST_READS = os.environ.get("PIZZERIA_FAST_READS", "").lower() == "true"
+# Answer ingredient filters on the pizza list from the in-memory index.
+PIZZERIA_INGREDIENT_INDEX = (
+    os.environ.get("PIZZERIA_INGREDIENT_INDEX", "true").lower() == "true"
+)
+
+# Precomputed OpenAPI document written by ``manage.py generate_openapi_schema``.
+OPENAPI_SCHEMA_FILE = os.environ.get("OPENAPI_SCHEMA_FILE") or str(
+    BASE_DIR / "openapi-schema.json"
+)
+
+# The UIs fetch the document from the cached endpoint instead of ?format=openapi.
+SWAGGER_SETTINGS = {"SPEC_URL": ("schema-json", {"format": ".json"})}
+REDOC_SETTINGS = {"SPEC_URL": ("schema-json", {"format": ".json"})}
+
+# Worker processes forked by ``manage.py serve``.
+SERVE_WORKERS = int(os.environ.get("SERVE_WORKERS", 1))
+
+SERVER_TIMING_ENABLED = os.environ.get("SERVER_TIMING_ENABLED", "").lower() == "true"
+SERVER_TIMING_LOG = os.environ.get("SERVER_TIMING_LOG", "").lower() == "true"
+
+# Responses smaller than this many bytes are sent uncompressed.
+COMPRESSION_MIN_LENGTH = int(os.environ.get("COMPRESSION_MIN_LENGTH", 1024))
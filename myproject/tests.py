@@ -0,0 +1,371 @@
+import gzip
+import json
+import logging
+import socket
+import threading
+from datetime import date, datetime, time, timedelta
+from datetime import timezone as dt_timezone
+from io import StringIO
+
+import msgpack
+import pytest
+from decimal import Decimal
+from django.conf import settings as django_settings
+from django.core.management import CommandError, call_command
+from django.db import connections
+from django.db.utils import ConnectionHandler
+from psycopg_pool import ConnectionPool
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from pizzeria.models import Ingredient, Pizza
+from pizzeria.urls import urlpatterns as pizzeria_patterns
+
+from pizzeria.serializers import IngredientSerializer
+
+from .middleware import pool_stats
+from .renderers import FastJSONRenderer
+from . import database, schema
+from .serving import SharedSocketWSGIServer, measure_ttfb, warm_up
+
+
+@pytest.fixture
+def api_client():
+    """Fixture for API client."""
+    return APIClient()
+
+
+@pytest.mark.django_db
+def test_server_timing_disabled_by_default(api_client, settings):
+    """Test that no Server-Timing header is sent when the middleware is off."""
+    settings.SERVER_TIMING_ENABLED = False
+
+    response = api_client.get("/api/pizzas/")
+
+    assert "Server-Timing" not in response
+
+
+@pytest.mark.django_db
+def test_server_timing_header(api_client, settings):
+    """Test that query count, DB, serializer and total timings are reported."""
+    settings.SERVER_TIMING_ENABLED = True
+    pizza = Pizza.objects.create(name="Margherita", price=10.50)
+    pizza.ingredients.add(Ingredient.objects.create(name="Tomato"))
+
+    response = api_client.get(f"/api/pizzas/{pizza.id}/")
+
+    metrics = {
+        entry.split(";")[0].strip(): entry
+        for entry in response["Server-Timing"].split(",")
+    }
+    assert set(metrics) == {"db", "serializer", "total"}
+    assert 'desc="2 queries"' in metrics["db"]
+    assert "dur=" in metrics["serializer"]
+
+
+@pytest.mark.django_db
+def test_server_timing_log_line(api_client, settings, caplog):
+    """Test the optional structured log line."""
+    settings.SERVER_TIMING_ENABLED = True
+    settings.SERVER_TIMING_LOG = True
+    Pizza.objects.create(name="Margherita", price=10.50)
+
+    with caplog.at_level(logging.INFO, logger="myproject.server_timing"):
+        api_client.get("/api/pizzas/")
+
+    entry = json.loads(caplog.records[-1].getMessage())
+    assert entry["path"] == "/api/pizzas/"
+    assert entry["status"] == 200
+    assert entry["queries"] == 1
+    assert entry["total_ms"] >= entry["db_ms"]
+
+
+@pytest.mark.django_db
+def test_warm_up_loads_urls_serializers_and_connections():
+    """Test that warm-up resolves every URL pattern and opens the connections."""
+    stats = warm_up()
+
+    assert stats["patterns"] > len(pizzeria_patterns)
+    assert stats["serializers"] > 0
+    assert stats["connections"] == 1
+    assert callable(stats["application"])
+
+
+@pytest.mark.django_db(transaction=True)
+def test_shared_socket_server_reports_ttfb(settings):
+    """Test serving from a pre-bound socket and timing the first byte."""
+    settings.ALLOWED_HOSTS = ["localhost"]
+    sock = socket.create_server(("127.0.0.1", 0))
+    server = SharedSocketWSGIServer(sock, warm_up(connect=False)["application"])
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        status_code, seconds = measure_ttfb(sock.getsockname(), "/api/pizzas/")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert status_code == 200
+    assert seconds > 0
+
+
+@pytest.mark.django_db(transaction=True)
+def test_shared_socket_server_handles_connections_concurrently(settings):
+    """Test that a stalled client does not block the worker's other clients."""
+    settings.ALLOWED_HOSTS = ["localhost"]
+    sock = socket.create_server(("127.0.0.1", 0))
+    server = SharedSocketWSGIServer(sock, warm_up(connect=False)["application"])
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    stalled = socket.create_connection(sock.getsockname())
+    try:
+        stalled.sendall(b"GET /api/pizzas/ HTTP/1.1\r\nHost: localhost\r\n")
+        status_code, _ = measure_ttfb(sock.getsockname(), "/api/pizzas/", timeout=5)
+    finally:
+        stalled.close()
+        server.shutdown()
+        server.server_close()
+
+    assert status_code == 200
+
+
+@pytest.mark.django_db(transaction=True)
+def test_shared_socket_server_serves_static_files_under_debug(settings):
+    """Test that the served application handles /static/ when DEBUG is on."""
+    settings.ALLOWED_HOSTS = ["localhost"]
+    settings.DEBUG = True
+    sock = socket.create_server(("127.0.0.1", 0))
+    server = SharedSocketWSGIServer(sock, warm_up(connect=False)["application"])
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        status_code, _ = measure_ttfb(sock.getsockname(), "/static/admin/css/base.css")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert status_code == 200
+
+
+def test_serve_refuses_workers_with_process_local_cache(settings):
+    """Test that serve only forks several workers over a shared cache."""
+    settings.PIZZERIA_CACHE_ALIAS = "default"
+    assert django_settings.CACHES["default"]["BACKEND"].endswith("LocMemCache")
+
+    with pytest.raises(CommandError, match="local to each process"):
+        call_command("serve", "--workers", "2")
+
+
+def _standin_connection(path, conn_max_age):
+    default = django_settings.DATABASES["default"]
+    handler = ConnectionHandler(
+        {
+            "default": {
+                "ENGINE": "django.db.backends.sqlite3",
+                "NAME": str(path),
+                "CONN_MAX_AGE": conn_max_age,
+                "CONN_HEALTH_CHECKS": default["CONN_HEALTH_CHECKS"],
+            }
+        }
+    )
+    return handler["default"]
+
+
+def _serve_requests(connection, count):
+    """Run ``count`` queries bracketed like Django brackets each request."""
+    seen = []
+    for _ in range(count):
+        connection.close_if_unusable_or_obsolete()
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        seen.append(connection.connection)
+        connection.close_if_unusable_or_obsolete()
+    connection.close()
+    return seen
+
+
+def test_persistent_connections_are_reused_across_requests(tmp_path, django_db_blocker):
+    """Test that the configured CONN_MAX_AGE keeps one connection per worker."""
+    conn_max_age = django_settings.DATABASES["default"]["CONN_MAX_AGE"]
+    assert conn_max_age > 0
+
+    with django_db_blocker.unblock():
+        reused = _serve_requests(
+            _standin_connection(tmp_path / "a.db", conn_max_age), 5
+        )
+        churned = _serve_requests(_standin_connection(tmp_path / "b.db", 0), 5)
+
+    assert all(raw is reused[0] for raw in reused)
+    assert len({id(raw) for raw in churned}) == len(churned)
+
+
+@pytest.mark.django_db
+def test_pool_stats_without_pooling():
+    """Test that pool metrics are only reported for pooled aliases."""
+    assert pool_stats() is None
+
+
+def test_pool_options_from_environment():
+    """Test the pool limits and the checkout health check built from DB_POOL_*."""
+    environ = {
+        "DB_POOL_MIN_SIZE": "4",
+        "DB_POOL_MAX_SIZE": "20",
+        "DB_POOL_TIMEOUT": "2.5",
+    }
+
+    options = database.pool_options(environ)
+
+    assert options["check"] is ConnectionPool.check_connection
+    assert (options["min_size"], options["max_size"]) == (4, 20)
+    assert options["timeout"] == 2.5
+    assert "check" not in database.pool_options(environ, health_checks=False)
+    pool = ConnectionPool("", open=False, **options)
+    assert (pool.min_size, pool.max_size, pool.timeout) == (4, 20, 2.5)
+
+
+@pytest.mark.django_db
+def test_pool_stats_with_pooling(monkeypatch):
+    """Test that pool counters are mapped to the Server-Timing log names."""
+
+    class StubPool:
+        def get_stats(self):
+            return {"requests_num": 7, "requests_queued": 2, "pool_size": 4}
+
+    monkeypatch.setattr(connections["default"], "pool", StubPool(), raising=False)
+
+    assert pool_stats() == {
+        "checkouts": 7,
+        "waits": 2,
+        "wait_ms": 0,
+        "timeouts": 0,
+        "size": 4,
+        "available": 0,
+        "connections_lost": 0,
+    }
+
+
+@pytest.fixture
+def schema_file(tmp_path, settings):
+    """Fixture pointing OPENAPI_SCHEMA_FILE at a temporary path."""
+    settings.OPENAPI_SCHEMA_FILE = str(tmp_path / "openapi-schema.json")
+    schema.get_schema.cache_clear()
+    yield settings.OPENAPI_SCHEMA_FILE
+    schema.get_schema.cache_clear()
+
+
+@pytest.mark.django_db
+def test_schema_is_served_from_memory_with_etag(api_client, schema_file, monkeypatch):
+    """Test that the schema is generated once and revalidated by ETag."""
+    calls = []
+    generate = schema.generate_schema
+    monkeypatch.setattr(
+        schema, "generate_schema", lambda: calls.append(1) or generate()
+    )
+
+    response = api_client.get("/swagger.json")
+    assert response.status_code == 200
+    assert "/api/pizzas/" in json.loads(response.content)["paths"]
+    etag = response["ETag"]
+
+    assert api_client.get("/swagger.json", HTTP_IF_NONE_MATCH=etag).status_code == 304
+    response = api_client.get("/swagger.yaml")
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+    assert b"swagger: '2.0'" in response.content
+    assert len(calls) == 1
+
+
+@pytest.mark.django_db
+def test_schema_ui_pages_use_the_cached_document(api_client, schema_file):
+    """Test that swagger-ui and ReDoc point at the cached JSON document."""
+    for url in ("/swagger/", "/redoc/"):
+        response = api_client.get(url)
+        assert response.status_code == 200
+        assert b"/swagger.json" in response.content
+
+    response = api_client.get("/swagger/?format=openapi")
+    assert response.status_code == 200
+    assert "/api/pizzas/" in json.loads(response.content)["paths"]
+
+
+def test_generate_openapi_schema_command(schema_file, monkeypatch):
+    """Test that the stored schema is used until serializers change."""
+    call_command("generate_openapi_schema", stdout=StringIO())
+    call_command("generate_openapi_schema", "--check", stdout=StringIO())
+    assert schema.get_schema().source == schema_file
+
+    monkeypatch.setattr(IngredientSerializer.Meta, "fields", ["id", "name"])
+    assert schema.load_schema() is None
+    with pytest.raises(CommandError):
+        call_command("generate_openapi_schema", "--check", stdout=StringIO())
+
+
+def test_fast_json_renderer_matches_default_renderer():
+    """Test that the orjson renderer writes the default renderer's bytes."""
+    data = {
+        "results": [
+            {"name": 'Jalapeño \u2028 "picante"', "price": Decimal("9.50")},
+            {"name": "Ají 🌶", "tags": ["a", None, True, 1.5, 10**12]},
+        ],
+        "next": None,
+    }
+
+    assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+    indented = "application/json; indent=2"
+    assert FastJSONRenderer().render(data, indented) == JSONRenderer().render(
+        data, indented
+    )
+
+
+def test_fast_json_renderer_formats_datetimes_like_drf():
+    """Test that datetimes, dates and times go through DRF's encoder."""
+    data = {
+        "aware": datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc),
+        "naive": datetime(2024, 5, 1, 12, 30),
+        "offset": datetime(2024, 5, 1, 9, 0, tzinfo=dt_timezone(timedelta(hours=-3))),
+        "date": date(2024, 5, 1),
+        "time": time(8, 15, 30, 250000),
+    }
+
+    assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+def test_fast_json_renderer_renders_nan_as_null():
+    """Test the documented difference: NaN is null instead of an error."""
+    with pytest.raises(ValueError):
+        JSONRenderer().render({"price": float("nan")})
+    assert FastJSONRenderer().render({"price": float("nan")}) == b'{"price":null}'
+
+
+@pytest.mark.django_db
+def test_pizza_list_as_msgpack(api_client):
+    """Test that Accept: application/msgpack gets the same data, with its own ETag."""
+    pizza = Pizza.objects.create(name="Margherita", price=10.50)
+    pizza.ingredients.add(Ingredient.objects.create(name="Tomato"))
+    as_json = api_client.get("/api/pizzas/")
+
+    response = api_client.get("/api/pizzas/", HTTP_ACCEPT="application/msgpack")
+
+    assert response["Content-Type"] == "application/msgpack"
+    assert msgpack.unpackb(response.content) == as_json.json()
+    assert len(response.content) < len(as_json.content)
+    assert response["ETag"] != as_json["ETag"]
+    assert "Accept" in response["Vary"]
+
+
+@pytest.mark.django_db
+def test_responses_are_gzipped_above_the_threshold(api_client, settings):
+    """Test that only responses of COMPRESSION_MIN_LENGTH bytes or more are gzipped."""
+    settings.COMPRESSION_MIN_LENGTH = 2000
+    Pizza.objects.bulk_create(Pizza(name=f"Pizza {i}", price=9.00) for i in range(100))
+
+    response = api_client.get("/api/pizzas/", HTTP_ACCEPT_ENCODING="gzip")
+    assert response["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response["Vary"]
+    plain = api_client.get("/api/pizzas/")
+    assert "Content-Encoding" not in plain
+    assert gzip.decompress(response.content) == plain.content
+
+    response = api_client.get("/api/pizzas/?page_size=2", HTTP_ACCEPT_ENCODING="gzip")
+    assert len(response.content) < 2000
+    assert "Content-Encoding" not in response
@@ -1,22 +1,8 @@
 from django.contrib import admin
 from django.urls import path, include, re_path
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
 from rest_framework.authtoken import views
 
-schema_view = get_schema_view(
-    openapi.Info(
-        title="Pizzeria API",
-        default_version="v1",
-        description="API para gestionar pedidos de una pizzería",
-        terms_of_service="https://www.google.com/policies/terms/",
-        contact=openapi.Contact(email="contact@pizzeria.local"),
-        license=openapi.License(name="BSD License"),
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
+from .schema import CachedSchemaView
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -25,15 +11,13 @@ urlpatterns = [
     path("api/", include("pizzeria.urls")),
     re_path(
         r"^swagger(?P<format>\.json|\.yaml)$",
-        schema_view.without_ui(cache_timeout=0),
+        CachedSchemaView.without_ui(),
         name="schema-json",
     ),
     re_path(
         r"^swagger/$",
-        schema_view.with_ui("swagger", cache_timeout=0),
+        CachedSchemaView.with_ui("swagger"),
         name="schema-swagger-ui",
     ),
-    re_path(
-        r"^redoc/$", schema_view.with_ui("redoc", cache_timeout=0), name="schema-redoc"
-    ),
+    re_path(r"^redoc/$", CachedSchemaView.with_ui("redoc"), name="schema-redoc"),
 ]
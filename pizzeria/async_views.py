@@ -0,0 +1,104 @@
+import inspect
+
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from rest_framework.response import Response
+
+from .caching import aget_pizza_detail, aset_pizza_detail
+from .views import IngredientListCreateView, PizzaDetailView, PizzaListView
+
+
+class AsyncAPIViewMixin:
+    """
+    Serve coroutine handlers from a DRF view.
+
+    ``initial()`` (authentication, permissions, throttling and content
+    negotiation) may query the database, so it runs in a worker thread; the
+    handlers use the async ORM and cache APIs and render in the event loop.
+    Only read methods are exposed, which keeps every handler async as Django
+    requires.
+    """
+
+    http_method_names = ["get", "head", "options"]
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self, request.method.lower(), self.http_method_not_allowed
+                )
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if inspect.isawaitable(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def alist(self, request, *args, **kwargs):
+        # Filter backends and CursorPagination may query the database; run
+        # them the way the async ORM runs queries, in the thread-sensitive
+        # executor.
+        row_serializer = self.get_row_serializer()
+        queryset = await sync_to_async(self.get_list_queryset)(row_serializer)
+        page = await sync_to_async(self.paginate_queryset)(queryset)
+        return self.get_paginated_response(self.serialize_page(page, row_serializer))
+
+    async def get(self, request, *args, **kwargs):
+        response = await self.aget_not_modified_response(request)
+        if response is None:
+            response = await self.alist(request, *args, **kwargs)
+        return self.add_validators(response)
+
+
+class AsyncPizzaListView(AsyncAPIViewMixin, PizzaListView):
+    pass
+
+
+class AsyncPizzaDetailView(AsyncAPIViewMixin, PizzaDetailView):
+    async def aget_object(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.aget(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        except (queryset.model.DoesNotExist, TypeError, ValueError):
+            raise Http404
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    async def aget_cached_data(self, pk):
+        return self.select_cached_fields(await aget_pizza_detail(pk))
+
+    async def aset_cached_data(self, pk, data):
+        if self.selects_default_fields():
+            await aset_pizza_detail(pk, data)
+
+    async def get(self, request, *args, **kwargs):
+        response = await self.aget_not_modified_response(request)
+        if response is None:
+            pk = kwargs[self.lookup_url_kwarg or self.lookup_field]
+            data = await self.aget_cached_data(pk)
+            if data is None:
+                serializer = self.get_serializer(await self.aget_object())
+                data = serializer.data
+                await self.aset_cached_data(pk, data)
+            response = Response(data)
+        return self.add_validators(response)
+
+
+class AsyncIngredientListView(AsyncAPIViewMixin, IngredientListCreateView):
+    async def get(self, request, *args, **kwargs):
+        return await self.alist(request, *args, **kwargs)
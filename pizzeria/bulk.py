@@ -0,0 +1,104 @@
+from django.db import transaction
+
+from .models import Pizza
+from .signals import pizzas_bulk_changed
+
+PizzaIngredient = Pizza.ingredients.through
+
+
+def upsert_pizzas(items):
+    """
+    Create or update pizzas by name using bulk queries.
+
+    ``items`` are validated dicts with ``name``, ``price``, ``ingredients``
+    (ingredient ids) and an optional ``status``. When several stored pizzas
+    share a name, the oldest one is updated. Returns one result per item, in
+    input order.
+    """
+    names = [item["name"] for item in items]
+    existing = {
+        pizza.name: pizza
+        for pizza in Pizza.objects.filter(name__in=names).order_by("-id")
+    }
+
+    pizzas, to_create, to_update = [], [], []
+    for item in items:
+        pizza = existing.get(item["name"])
+        if pizza is None:
+            pizza = Pizza(name=item["name"], price=item["price"])
+            pizza.status = item.get("status", pizza.status)
+            to_create.append(pizza)
+        else:
+            pizza.price = item["price"]
+            pizza.status = item.get("status", pizza.status)
+            to_update.append(pizza)
+        pizzas.append(pizza)
+
+    updated_ids = [pizza.pk for pizza in to_update]
+    with transaction.atomic():
+        Pizza.objects.bulk_create(to_create)
+        if to_update:
+            Pizza.objects.bulk_update(to_update, ["price", "status"])
+            stale = PizzaIngredient.objects.filter(pizza_id__in=updated_ids)
+            ingredient_ids = set(stale.values_list("ingredient_id", flat=True))
+            stale.delete()
+        else:
+            ingredient_ids = set()
+        # A concurrent write may have inserted the same link since the read;
+        # skip it like RelatedManager.add() does instead of failing.
+        PizzaIngredient.objects.bulk_create(
+            (
+                PizzaIngredient(pizza_id=pizza.pk, ingredient_id=ingredient_id)
+                for pizza, item in zip(pizzas, items)
+                for ingredient_id in set(item["ingredients"])
+            ),
+            ignore_conflicts=True,
+        )
+        ingredient_ids.update(pk for item in items for pk in item["ingredients"])
+        pizzas_bulk_changed.send(
+            sender=Pizza,
+            pizza_ids=[pizza.pk for pizza in pizzas],
+            ingredient_ids=ingredient_ids,
+        )
+
+    created = {id(pizza) for pizza in to_create}
+    return [
+        {"id": pizza.pk, "name": pizza.name, "created": id(pizza) in created}
+        for pizza in pizzas
+    ]
+
+
+def set_pizza_ingredients(pizza, ingredient_ids):
+    """
+    Make ``ingredient_ids`` the pizza's exact ingredient set.
+
+    The current links are read with one query and only the difference is
+    written: one bulk INSERT for new links and one DELETE for dropped ones,
+    reported through ``pizzas_bulk_changed`` with just the ingredients that
+    changed. Nothing is written when the set is unchanged. Returns the added
+    and removed ingredient ids.
+    """
+    wanted = set(ingredient_ids)
+    current = set(
+        PizzaIngredient.objects.filter(pizza_id=pizza.pk).values_list(
+            "ingredient_id", flat=True
+        )
+    )
+    added, removed = wanted - current, current - wanted
+    if not added and not removed:
+        return added, removed
+
+    with transaction.atomic():
+        if removed:
+            PizzaIngredient.objects.filter(
+                pizza_id=pizza.pk, ingredient_id__in=removed
+            ).delete()
+        if added:
+            PizzaIngredient.objects.bulk_create(
+                (PizzaIngredient(pizza_id=pizza.pk, ingredient_id=pk) for pk in added),
+                ignore_conflicts=True,
+            )
+        pizzas_bulk_changed.send(
+            sender=Pizza, pizza_ids=[pizza.pk], ingredient_ids=added | removed
+        )
+    return added, removed
@@ -0,0 +1,124 @@
+import random
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+PIZZA_DETAIL_KEY = "pizzeria:pizza-detail:{pk}"
+MENU_VERSION_KEY = "pizzeria:menu-version"
+MENU_FACETS_KEY = "pizzeria:menu-facets:{variant}:{version}"
+INGREDIENT_INDEX_KEY = "pizzeria:ingredient-index-generation"
+
+
+def get_cache():
+    return caches[settings.PIZZERIA_CACHE_ALIAS]
+
+
+def pizza_detail_key(pk):
+    return PIZZA_DETAIL_KEY.format(pk=pk)
+
+
+def get_pizza_detail(pk):
+    return get_cache().get(pizza_detail_key(pk))
+
+
+def set_pizza_detail(pk, data):
+    get_cache().set(pizza_detail_key(pk), data, settings.PIZZERIA_DETAIL_CACHE_TIMEOUT)
+
+
+async def aget_pizza_detail(pk):
+    return await get_cache().aget(pizza_detail_key(pk))
+
+
+async def aset_pizza_detail(pk, data):
+    await get_cache().aset(
+        pizza_detail_key(pk), data, settings.PIZZERIA_DETAIL_CACHE_TIMEOUT
+    )
+
+
+def invalidate_pizza_details(pks):
+    keys = [pizza_detail_key(pk) for pk in pks]
+    if not keys:
+        return
+    get_cache().delete_many(keys)
+    # A concurrent read may repopulate the cache with pre-commit data, so
+    # drop the keys again once the writing transaction is committed.
+    transaction.on_commit(lambda: get_cache().delete_many(keys))
+
+
+def get_menu_facets(variant, version):
+    return get_cache().get(MENU_FACETS_KEY.format(variant=variant, version=version))
+
+
+def set_menu_facets(variant, version, data):
+    # Keyed by menu version, so the next catalog write orphans the entry.
+    get_cache().set(
+        MENU_FACETS_KEY.format(variant=variant, version=version),
+        data,
+        settings.PIZZERIA_FACETS_CACHE_TIMEOUT,
+    )
+
+
+def _new_menu_version():
+    return {"version": uuid.uuid4().hex, "last_modified": int(time.time())}
+
+
+def get_menu_version():
+    """
+    Return the catalog marker as ``{"version": ..., "last_modified": ...}``.
+
+    The marker changes on every write to pizzas, ingredients or the links
+    between them. A missing marker (cold or evicted cache) is recreated, which
+    only costs clients one full response.
+    """
+    cache = get_cache()
+    marker = cache.get(MENU_VERSION_KEY)
+    if marker is None:
+        cache.add(MENU_VERSION_KEY, _new_menu_version(), None)
+        marker = cache.get(MENU_VERSION_KEY) or _new_menu_version()
+    return marker
+
+
+async def aget_menu_version():
+    """Async ``get_menu_version()``, safe for backends that use the ORM."""
+    cache = get_cache()
+    marker = await cache.aget(MENU_VERSION_KEY)
+    if marker is None:
+        await cache.aadd(MENU_VERSION_KEY, _new_menu_version(), None)
+        marker = await cache.aget(MENU_VERSION_KEY) or _new_menu_version()
+    return marker
+
+
+def bump_menu_version():
+    get_cache().set(MENU_VERSION_KEY, _new_menu_version(), None)
+    # Bump again on commit so validators computed from uncommitted data are
+    # never reused.
+    transaction.on_commit(
+        lambda: get_cache().set(MENU_VERSION_KEY, _new_menu_version(), None)
+    )
+
+
+def get_index_generation():
+    """
+    Return the counter of committed writes that affect the ingredient index.
+
+    A missing counter is recreated from a random base rather than zero, so a
+    process whose index carries a pre-eviction generation never mistakes
+    itself for current.
+    """
+    cache = get_cache()
+    generation = cache.get(INGREDIENT_INDEX_KEY)
+    if generation is None:
+        cache.add(INGREDIENT_INDEX_KEY, random.getrandbits(48), None)
+        generation = cache.get(INGREDIENT_INDEX_KEY)
+    return random.getrandbits(48) if generation is None else generation
+
+
+def next_index_generation():
+    """Advance the ingredient index counter and return the new value."""
+    try:
+        return get_cache().incr(INGREDIENT_INDEX_KEY)
+    except ValueError:
+        return get_index_generation()
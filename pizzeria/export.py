@@ -0,0 +1,97 @@
+import csv
+
+from django.db.models import Prefetch
+from rest_framework.negotiation import BaseContentNegotiation
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import Ingredient, Pizza
+from .serializers import PizzaExportSerializer
+
+CSV_COLUMNS = [
+    "id",
+    "name",
+    "price",
+    "status",
+    "ingredient_ids",
+    "ingredient_names",
+]
+
+
+def iter_pizza_chunks(chunk_size):
+    """
+    Yield serialized pizzas, ``chunk_size`` at a time, in id order.
+
+    Each chunk is read with a keyset query (``id > last id``) plus one
+    prefetch query for its ingredients, so the cost per chunk is two queries
+    however deep into the catalog it is, and only one chunk is held in memory.
+    """
+    ingredients = Prefetch("ingredients", queryset=Ingredient.objects.order_by("id"))
+    last_id = 0
+    while True:
+        chunk = list(
+            Pizza.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .prefetch_related(ingredients)[:chunk_size]
+        )
+        if not chunk:
+            return
+        yield PizzaExportSerializer(chunk, many=True).data
+        if len(chunk) < chunk_size:
+            return
+        last_id = chunk[-1].id
+
+
+def iter_ndjson(chunk_size):
+    """One JSON document per pizza, newline-delimited."""
+    encoder = JSONEncoder(ensure_ascii=False)
+    for rows in iter_pizza_chunks(chunk_size):
+        yield "".join(encoder.encode(row) + "\n" for row in rows)
+
+
+class _Echo:
+    """File-like object whose ``write`` hands the line back to ``csv.writer``."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(chunk_size):
+    """One CSV row per pizza; ingredient ids and names are ``|``-separated."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    for rows in iter_pizza_chunks(chunk_size):
+        yield "".join(
+            writer.writerow(
+                [
+                    row["id"],
+                    row["name"],
+                    row["price"],
+                    row["status"],
+                    "|".join(str(item["id"]) for item in row["ingredients"]),
+                    "|".join(item["name"] for item in row["ingredients"]),
+                ]
+            )
+            for row in rows
+        )
+
+
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", iter_ndjson),
+    "csv": ("text/csv; charset=utf-8", iter_csv),
+}
+
+
+class ExportContentNegotiation(BaseContentNegotiation):
+    """
+    Ignore ``Accept`` on the export endpoints.
+
+    The format comes from the URL suffix and the response bypasses the
+    renderers, so ``Accept: text/csv`` must not be answered with a 406. Error
+    responses use the first configured renderer.
+    """
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
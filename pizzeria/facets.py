@@ -0,0 +1,82 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Count, Max, Min, Q
+from rest_framework import serializers
+
+from .models import Ingredient, Pizza
+
+_price = serializers.DecimalField(max_digits=5, decimal_places=2)
+
+
+def price_ranges(boundaries=None):
+    """Turn bucket boundaries ``[10, 15]`` into ``[(None, 10), (10, 15), (15, None)]``."""
+    if boundaries is None:
+        boundaries = settings.PIZZERIA_FACET_PRICE_BUCKETS
+    edges = [None] + sorted(Decimal(str(value)) for value in boundaries) + [None]
+    return list(zip(edges, edges[1:]))
+
+
+def _format_price(value):
+    return None if value is None else _price.to_representation(value)
+
+
+def compute_facets(include_inactive=False):
+    """
+    Aggregate the catalog with one grouped query per model.
+
+    Pizzas are grouped by status, each group carrying its count, min and max
+    price and one conditional count per price bucket; the groups are then
+    summed here. Ingredients are counted per category. Without
+    ``include_inactive`` only active pizzas are described, as in the list.
+    """
+    ranges = price_ranges()
+    aggregates = {"count": Count("id"), "min": Min("price"), "max": Max("price")}
+    for number, (low, high) in enumerate(ranges):
+        bucket = Q()
+        if low is not None:
+            bucket &= Q(price__gte=low)
+        if high is not None:
+            bucket &= Q(price__lt=high)
+        aggregates[f"bucket_{number}"] = Count("id", filter=bucket)
+
+    pizzas = Pizza.objects.all()
+    if not include_inactive:
+        pizzas = pizzas.filter(status="active")
+    groups = list(pizzas.order_by().values("status").annotate(**aggregates))
+
+    statuses = [value for value, _ in Pizza.STATUS_CHOICES]
+    if not include_inactive:
+        statuses = ["active"]
+    status_counts = dict.fromkeys(statuses, 0)
+    status_counts.update((group["status"], group["count"]) for group in groups)
+    minimums = [group["min"] for group in groups if group["min"] is not None]
+    maximums = [group["max"] for group in groups if group["max"] is not None]
+
+    categories = dict.fromkeys((value for value, _ in Ingredient.CATEGORY_CHOICES), 0)
+    categories.update(
+        Ingredient.objects.order_by()
+        .values("category")
+        .annotate(count=Count("id"))
+        .values_list("category", "count")
+    )
+
+    return {
+        "pizzas": {
+            "total": sum(status_counts.values()),
+            "status": status_counts,
+            "price": {
+                "min": _format_price(min(minimums, default=None)),
+                "max": _format_price(max(maximums, default=None)),
+                "buckets": [
+                    {
+                        "min": _format_price(low),
+                        "max": _format_price(high),
+                        "count": sum(group[f"bucket_{number}"] for group in groups),
+                    }
+                    for number, (low, high) in enumerate(ranges)
+                ],
+            },
+        },
+        "ingredients": {"total": sum(categories.values()), "category": categories},
+    }
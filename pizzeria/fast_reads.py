@@ -0,0 +1,121 @@
+import decimal
+import functools
+
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+
+def _decimal_converter(field):
+    coerce_to_string = getattr(
+        field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING
+    )
+    if (
+        field.decimal_places is None
+        or field.normalize_output
+        or field.localize
+        or not coerce_to_string
+    ):
+        return field.to_representation
+    # DecimalField.quantize() copies the context and builds the quantum on
+    # every call; build them once.
+    quantum = decimal.Decimal(".1") ** field.decimal_places
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+    rounding = field.rounding
+
+    def convert(value):
+        if not isinstance(value, decimal.Decimal):
+            value = decimal.Decimal(str(value).strip())
+        return "{:f}".format(
+            value.quantize(quantum, rounding=rounding, context=context)
+        )
+
+    return convert
+
+
+def _choice_converter(field):
+    choices = field.choice_strings_to_values
+
+    def convert(value):
+        if value == "":
+            return value
+        return choices.get(str(value), value)
+
+    return convert
+
+
+def _converter(field):
+    """Return a function doing ``field.to_representation`` on a raw column value."""
+    if isinstance(field, serializers.DecimalField):
+        return _decimal_converter(field)
+    if isinstance(field, serializers.ChoiceField):
+        return _choice_converter(field)
+    if type(field) is serializers.CharField:
+        return str
+    if type(field) is serializers.IntegerField:
+        return int
+    return field.to_representation
+
+
+class RowSerializer:
+    """
+    Render ``values()`` rows exactly like a serializer renders instances.
+
+    Each selected field becomes a ``(name, column, converter)`` triple
+    compiled once, so a row costs one dict lookup and one call per field
+    instead of a serializer pass. Model fields read their ``source`` column;
+    ``SerializerMethodField``\\s must be mapped to an annotation in
+    ``Meta.row_sources``.
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    @classmethod
+    def compile(cls, serializer_class, fields=None):
+        """Return a row serializer, or ``None`` if a field needs an instance."""
+        row_sources = getattr(serializer_class.Meta, "row_sources", {})
+        columns = []
+        for name, field in serializer_class(fields=fields).fields.items():
+            if isinstance(field, serializers.SerializerMethodField):
+                if name not in row_sources:
+                    return None
+                columns.append((name, row_sources[name], None))
+            elif isinstance(
+                field,
+                (
+                    serializers.BaseSerializer,
+                    serializers.RelatedField,
+                    serializers.ManyRelatedField,
+                ),
+            ) or (field.source == "*" or "." in field.source):
+                return None
+            else:
+                columns.append((name, field.source, _converter(field)))
+        return cls(columns)
+
+    @property
+    def values(self):
+        """The ``values()`` arguments the rows must carry."""
+        return [column for _, column, _ in self.columns]
+
+    def render(self, rows):
+        columns = self.columns
+        return [
+            {
+                name: (
+                    value
+                    if (value := row[column]) is None or convert is None
+                    else convert(value)
+                )
+                for name, column, convert in columns
+            }
+            for row in rows
+        ]
+
+
+@functools.lru_cache(maxsize=None)
+def get_row_serializer(serializer_class, fields):
+    """Compile (once per field selection) the row serializer for a view."""
+    return RowSerializer.compile(serializer_class, list(fields))
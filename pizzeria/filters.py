@@ -0,0 +1,101 @@
+from django.conf import settings
+from django.db import connection
+from django.db.models import Exists, OuterRef
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .ingredient_index import get_index, ids_after, ids_before
+from .models import Ingredient, Pizza
+
+
+class IngredientFilter(BaseFilterBackend):
+    """
+    Filter pizzas by ingredient ids.
+
+    ``?ingredients_all=1,2`` keeps pizzas with every listed ingredient,
+    ``?ingredients_any=3,4`` those with at least one and
+    ``?ingredients_exclude=5`` drops those with any. Lookups are answered by
+    the in-memory ``IngredientIndex``; the queryset then only has to fetch the
+    ids of the requested cursor page. Without a current index (disabled, not
+    built yet or behind another process's writes) the same filters run as
+    ``EXISTS`` subqueries.
+    """
+
+    params = {
+        "all_of": "ingredients_all",
+        "any_of": "ingredients_any",
+        "exclude": "ingredients_exclude",
+    }
+
+    @cached_property
+    def max_id(self):
+        internal_type = Ingredient._meta.pk.get_internal_type()
+        return connection.ops.integer_field_range(internal_type)[1]
+
+    def get_terms(self, request):
+        terms, errors = {}, {}
+        for term, param in self.params.items():
+            values = [
+                value.strip()
+                for value in request.query_params.get(param, "").split(",")
+                if value.strip()
+            ]
+            try:
+                terms[term] = sorted({int(value) for value in values})
+            except ValueError:
+                errors[param] = ["Expected a comma-separated list of ingredient ids."]
+            else:
+                if terms[term] and not (
+                    1 <= terms[term][0] and terms[term][-1] <= self.max_id
+                ):
+                    errors[param] = [
+                        f"Ingredient ids must be between 1 and {self.max_id}."
+                    ]
+        if errors:
+            raise ValidationError(errors)
+        return terms
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_terms(request)
+        if not any(terms.values()):
+            return queryset
+        index = get_index() if settings.PIZZERIA_INGREDIENT_INDEX else None
+        if index is None:
+            return self.filter_in_database(queryset, **terms)
+        include_inactive = getattr(view, "include_inactive", lambda: True)()
+        bits = index.match(active_only=not include_inactive, **terms)
+        return queryset.filter(pk__in=self.get_page_ids(request, view, bits))
+
+    def get_page_ids(self, request, view, bits):
+        """
+        Return the matching ids the paginator can reach from its cursor.
+
+        ``CatalogCursorPagination`` reads ``offset + page_size + 1`` rows past
+        the cursor position, so handing it exactly those ids keeps its pages
+        and links identical to an unfiltered walk.
+        """
+        paginator = getattr(view, "paginator", None)
+        page_size = paginator and paginator.get_page_size(request)
+        if not page_size or not hasattr(paginator, "decode_cursor"):
+            return ids_after(bits)
+        cursor = paginator.decode_cursor(request)
+        offset, reverse, position = cursor or (0, False, None)
+        try:
+            position = None if position is None else max(int(position), -1)
+        except ValueError:
+            raise NotFound(paginator.invalid_cursor_message)
+        limit = offset + page_size + 1
+        if reverse:
+            return ids_before(bits, position, limit)
+        return ids_after(bits, position, limit)
+
+    def filter_in_database(self, queryset, all_of, any_of, exclude):
+        links = Pizza.ingredients.through.objects.filter(pizza_id=OuterRef("pk"))
+        for pk in all_of:
+            queryset = queryset.filter(Exists(links.filter(ingredient_id=pk)))
+        if any_of:
+            queryset = queryset.filter(Exists(links.filter(ingredient_id__in=any_of)))
+        if exclude:
+            queryset = queryset.exclude(Exists(links.filter(ingredient_id__in=exclude)))
+        return queryset
@@ -0,0 +1,92 @@
+import csv
+import json
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+
+from .models import Ingredient, Pizza
+
+FORMATS = {".csv": "csv", ".json": "json", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+
+
+def guess_format(path):
+    for extension, file_format in FORMATS.items():
+        if str(path).lower().endswith(extension):
+            return file_format
+    raise ValueError(f"cannot tell the format of {path}; pass --format")
+
+
+def read_records(path, file_format):
+    """
+    Yield ``(location, record)`` pairs from a CSV, JSON array or NDJSON file.
+
+    CSV and NDJSON are streamed; a JSON array is loaded at once.
+    """
+    with open(path, newline="", encoding="utf-8") as source:
+        if file_format == "csv":
+            reader = csv.DictReader(source)
+            for record in reader:
+                yield f"line {reader.line_num}", record
+        elif file_format == "ndjson":
+            for number, line in enumerate(source, 1):
+                if line.strip():
+                    yield f"line {number}", json.loads(line)
+        else:
+            for number, record in enumerate(json.load(source), 1):
+                yield f"item {number}", record
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _clean(model, field_name, value):
+    try:
+        return model._meta.get_field(field_name).clean(value, None)
+    except ValidationError as exc:
+        raise ValueError(f"{field_name}: {' '.join(exc.messages)}") from None
+
+
+def _clean_ingredient_ref(ref):
+    if isinstance(ref, dict):
+        name, category = ref.get("name"), ref.get("category")
+    else:
+        name, category = ref, None
+    name = _clean(Ingredient, "name", (name or "").strip())
+    if category:
+        category = _clean(Ingredient, "category", category)
+    return name, category
+
+
+def clean_ingredient(record):
+    """Validate an ingredient record: a name, or a dict with name and category."""
+    name, category = _clean_ingredient_ref(record)
+    return {"name": name, "category": category or "basic"}
+
+
+def clean_pizza(record):
+    """
+    Validate a pizza record without touching the database.
+
+    Ingredients are names: a ``|``-separated ``ingredients`` (or
+    ``ingredient_names``, as written by the export) column in CSV, or a list
+    of names or ``{"name", "category"}`` objects in JSON. Returns a dict with
+    ``name``, ``price``, ``ingredients`` as ``(name, category)`` pairs and
+    ``status`` when the record has one.
+    """
+    if not isinstance(record, dict):
+        raise ValueError("expected an object")
+    refs = record.get("ingredients", record.get("ingredient_names")) or []
+    if isinstance(refs, str):
+        refs = [ref for ref in refs.split("|") if ref.strip()]
+
+    item = {
+        "name": _clean(Pizza, "name", (record.get("name") or "").strip()),
+        "price": _clean(Pizza, "price", record.get("price")),
+        "ingredients": [_clean_ingredient_ref(ref) for ref in refs],
+    }
+    if record.get("status"):
+        item["status"] = _clean(Pizza, "status", record["status"])
+    return item
@@ -0,0 +1,242 @@
+import threading
+from collections import defaultdict
+
+from django.db import transaction
+
+from .caching import get_index_generation, next_index_generation
+from .models import Pizza
+
+PizzaIngredient = Pizza.ingredients.through
+
+# Bits examined per step when walking a bitset, so each step works on a small
+# int instead of shifting the whole catalog.
+CHUNK_BITS = 1024
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+# Writes touching more pizzas than this mark the index for a rebuild instead
+# of patching it.
+MAX_DELTA_PIZZAS = 1000
+
+
+def to_bitset(ids):
+    """Pack non-negative ints into an int with bit ``id`` set for each id."""
+    if not ids:
+        return 0
+    buffer = bytearray(max(ids) // 8 + 1)
+    for pk in ids:
+        buffer[pk >> 3] |= 1 << (pk & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def ids_after(bits, position=None, limit=None):
+    """Return up to ``limit`` set bits greater than ``position``, ascending."""
+    start = 0 if position is None else position + 1
+    bits >>= start
+    found = []
+    while bits and (limit is None or len(found) < limit):
+        # Jump straight to the lowest set bit, then read a chunk from there.
+        skip = (bits & -bits).bit_length() - 1
+        bits >>= skip
+        start += skip
+        chunk = bits & CHUNK_MASK
+        while chunk and (limit is None or len(found) < limit):
+            low = chunk & -chunk
+            found.append(start + low.bit_length() - 1)
+            chunk ^= low
+        bits >>= CHUNK_BITS
+        start += CHUNK_BITS
+    return found
+
+
+def ids_before(bits, position=None, limit=None):
+    """Return up to ``limit`` set bits lower than ``position``, descending."""
+    if position is not None and position < bits.bit_length():
+        bits &= (1 << max(position, 0)) - 1
+    found = []
+    while bits and (limit is None or len(found) < limit):
+        low = max(bits.bit_length() - CHUNK_BITS, 0)
+        chunk = bits >> low
+        while chunk and (limit is None or len(found) < limit):
+            high = chunk.bit_length() - 1
+            found.append(low + high)
+            chunk ^= 1 << high
+        bits &= (1 << low) - 1
+    return found
+
+
+class IngredientIndex:
+    """
+    An inverted index from ingredient id to the pizzas that use it.
+
+    Every posting list is a bitset (an int with bit ``pizza_id`` set), so
+    include-all, include-any and exclude filters are a handful of AND/OR/NOT
+    operations on machine words, independent of how many rows match. The
+    index is tagged with the index generation (see ``get_index_generation``)
+    it reflects.
+    """
+
+    def __init__(self, generation, postings, everything, active):
+        self.generation = generation
+        self.postings = postings
+        self.everything = everything
+        self.active = active
+        self.stale = False
+
+    @classmethod
+    def build(cls, generation):
+        """Load the index with two queries: pizza statuses and the M2M rows."""
+        every, active = [], []
+        for pk, status in Pizza.objects.values_list("id", "status").iterator():
+            every.append(pk)
+            if status == "active":
+                active.append(pk)
+        postings = defaultdict(list)
+        links = PizzaIngredient.objects.values_list("ingredient_id", "pizza_id")
+        for ingredient_id, pizza_id in links.iterator():
+            postings[ingredient_id].append(pizza_id)
+        return cls(
+            generation,
+            {pk: to_bitset(ids) for pk, ids in postings.items()},
+            to_bitset(every),
+            to_bitset(active),
+        )
+
+    def updated(self, pizza_ids, ingredient_ids):
+        """
+        Return a copy with the given pizzas and their links re-read.
+
+        Costs at most two queries. Links between these pizzas and any other
+        ingredient are assumed unchanged, so ``ingredient_ids`` must hold
+        every ingredient whose links to them were added or removed. The index
+        itself is left untouched: lookups running in other threads keep a
+        consistent view until the copy is published.
+        """
+        statuses = dict(
+            Pizza.objects.filter(pk__in=pizza_ids).values_list("id", "status")
+        )
+        links = defaultdict(list)
+        if ingredient_ids:
+            rows = PizzaIngredient.objects.filter(
+                pizza_id__in=pizza_ids, ingredient_id__in=ingredient_ids
+            ).values_list("ingredient_id", "pizza_id")
+            for ingredient_id, pizza_id in rows:
+                links[ingredient_id].append(pizza_id)
+
+        keep = ~to_bitset(pizza_ids)
+        postings = dict(self.postings)
+        for pk in ingredient_ids:
+            bits = (postings.get(pk, 0) & keep) | to_bitset(links[pk])
+            if bits:
+                postings[pk] = bits
+            else:
+                postings.pop(pk, None)
+        return IngredientIndex(
+            self.generation,
+            postings,
+            (self.everything & keep) | to_bitset(list(statuses)),
+            (self.active & keep)
+            | to_bitset([pk for pk, status in statuses.items() if status == "active"]),
+        )
+
+    def match(self, all_of=(), any_of=(), exclude=(), active_only=True):
+        """Return the bitset of pizzas matching the ingredient filters."""
+        bits = self.active if active_only else self.everything
+        for pk in all_of:
+            bits &= self.postings.get(pk, 0)
+        if any_of:
+            union = 0
+            for pk in any_of:
+                union |= self.postings.get(pk, 0)
+            bits &= union
+        for pk in exclude:
+            bits &= ~self.postings.get(pk, 0)
+        return bits
+
+
+_index = None
+_lock = threading.Lock()
+_rebuild_pending = False
+
+
+def get_index():
+    """
+    Return the process-wide index if it is current, else ``None``.
+
+    Writes made in this process patch the index as they commit (see
+    ``update_index``). Writes from other processes only advance the shared
+    generation counter, and only when ``PIZZERIA_CACHE_ALIAS`` is a cache the
+    processes share; an index that falls behind it is rebuilt after the
+    current response (see ``rebuild_pending_index``). Until then callers get
+    ``None`` and should query the database instead.
+    """
+    global _rebuild_pending
+    index = _index
+    if (
+        index is not None
+        and not index.stale
+        and index.generation == get_index_generation()
+    ):
+        return index
+    _rebuild_pending = True
+    return None
+
+
+def rebuild_index():
+    """Build the index now; return it, or ``None`` if another thread is."""
+    global _index, _rebuild_pending
+    if not _lock.acquire(blocking=False):
+        return None
+    try:
+        _rebuild_pending = False
+        # Read the generation before the rows: a write that commits meanwhile
+        # advances it, so the rows may be newer than the tag but never older.
+        _index = IngredientIndex.build(get_index_generation())
+        return _index
+    finally:
+        _lock.release()
+
+
+def rebuild_pending_index():
+    """Rebuild the index if a lookup found it out of date."""
+    if _rebuild_pending:
+        rebuild_index()
+
+
+def update_index(pizza_ids, ingredient_ids=()):
+    """
+    Patch the index for a write once its transaction commits.
+
+    ``pizza_ids`` are the pizzas whose status or links changed and
+    ``ingredient_ids`` the ingredients whose links to them changed.
+    """
+    pizza_ids, ingredient_ids = list(pizza_ids), list(ingredient_ids)
+    if pizza_ids:
+        transaction.on_commit(lambda: _apply_update(pizza_ids, ingredient_ids))
+
+
+def _apply_update(pizza_ids, ingredient_ids):
+    global _index
+    if not _lock.acquire(blocking=False):
+        # A rebuild is reading the tables; it either sees this write or gets
+        # tagged with a generation older than the one advanced here.
+        next_index_generation()
+        return
+    try:
+        index = _index
+        if index is None or index.stale or len(pizza_ids) > MAX_DELTA_PIZZAS:
+            if index is not None:
+                index.stale = True
+            next_index_generation()
+            return
+        updated = index.updated(pizza_ids, ingredient_ids)
+        generation = next_index_generation()
+        if generation == index.generation + 1:
+            updated.generation = generation
+            # One assignment publishes the new postings and status bitsets
+            # together.
+            _index = updated
+        else:
+            # Another process wrote since this index was current.
+            index.stale = True
+    finally:
+        _lock.release()
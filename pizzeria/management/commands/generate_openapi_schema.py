@@ -0,0 +1,43 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from myproject.schema import load_schema, write_schema
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the OpenAPI schema once and write it, with a fingerprint of the "
+        "URLconf and serializers, to OPENAPI_SCHEMA_FILE."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            default=settings.OPENAPI_SCHEMA_FILE,
+            help="File to write the schema to.",
+        )
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only verify that the file matches the current URLconf and "
+            "serializers; exit with an error if it is missing or stale.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["output"]
+        if options["check"]:
+            if load_schema(path) is None:
+                raise CommandError(f"{path} is missing or out of date.")
+            self.stdout.write(self.style.SUCCESS(f"{path} is up to date."))
+            return
+
+        start = time.perf_counter()
+        schema = write_schema(path)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {path} ({len(schema.bodies['json'])} bytes, fingerprint "
+                f"{schema.fingerprint[:12]}) in {time.perf_counter() - start:.2f}s."
+            )
+        )
@@ -0,0 +1,161 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from myproject.serving import is_process_local_cache
+from pizzeria.bulk import upsert_pizzas
+from pizzeria.importer import (
+    batched,
+    clean_ingredient,
+    clean_pizza,
+    guess_format,
+    read_records,
+)
+from pizzeria.models import Ingredient, Pizza
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk load pizzas and ingredients from CSV, JSON or NDJSON files. Pizzas "
+        "are created or updated by name; unknown ingredient names are created."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("pizzas", nargs="?", help="File with pizzas.")
+        parser.add_argument(
+            "--ingredients",
+            help="File with ingredients (name and optional category).",
+        )
+        parser.add_argument(
+            "--format",
+            choices=["csv", "json", "ndjson"],
+            help="Format of the input files; guessed from each extension by default.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows written per transaction.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Validate the files and report what would change without writing.",
+        )
+
+    def handle(self, *args, **options):
+        if not options["pizzas"] and not options["ingredients"]:
+            raise CommandError("Give a pizzas file, --ingredients, or both.")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        if not options["dry_run"] and is_process_local_cache(
+            settings.PIZZERIA_CACHE_ALIAS
+        ):
+            self.stderr.write(
+                self.style.WARNING(
+                    f"The {settings.PIZZERIA_CACHE_ALIAS!r} cache is local to this "
+                    "process: running web servers will not see the new menu "
+                    "version and keep serving cached responses, facets and "
+                    "ingredient filters until restarted. Configure a shared "
+                    "CACHE_BACKEND."
+                )
+            )
+        start = time.perf_counter()
+
+        # First pass: validate everything before writing anything.
+        categories, rows = self.validate(options)
+        ingredient_ids, missing = self.create_ingredients(
+            categories, options["batch_size"], options["dry_run"]
+        )
+        created = updated = 0
+        if options["pizzas"]:
+            created, updated = self.import_pizzas(options, ingredient_ids)
+        self.report(
+            created, updated, len(missing), rows, start, dry_run=options["dry_run"]
+        )
+
+    def validate(self, options):
+        """Read both files once; return the ingredient categories and row count."""
+        categories, rows = {}, 0
+        if options["ingredients"]:
+            for ingredient in self.records(
+                options["ingredients"], clean_ingredient, options["format"]
+            ):
+                categories.setdefault(ingredient["name"], ingredient["category"])
+                rows += 1
+        if options["pizzas"]:
+            names = set()
+            for item in self.records(options["pizzas"], clean_pizza, options["format"]):
+                if item["name"] in names:
+                    raise CommandError(f"Duplicate pizza name: {item['name']}")
+                names.add(item["name"])
+                for name, category in item["ingredients"]:
+                    categories.setdefault(name, category or "basic")
+                rows += 1
+        return categories, rows
+
+    def create_ingredients(self, categories, batch_size, dry_run):
+        """Create the unknown ingredients; return the name to id map and them."""
+        # Ingredient names resolve in memory; when names repeat the oldest wins.
+        ingredient_ids = dict(
+            Ingredient.objects.order_by("-id").values_list("name", "id")
+        )
+        missing = [name for name in categories if name not in ingredient_ids]
+        if not dry_run:
+            for batch in batched(missing, batch_size):
+                with transaction.atomic():
+                    new = Ingredient.objects.bulk_create(
+                        Ingredient(name=name, category=categories[name])
+                        for name in batch
+                    )
+                ingredient_ids.update(
+                    (ingredient.name, ingredient.pk) for ingredient in new
+                )
+        return ingredient_ids, missing
+
+    def import_pizzas(self, options, ingredient_ids):
+        """Upsert the pizzas batch by batch; return the created and updated counts."""
+        created = updated = 0
+        items = self.records(options["pizzas"], clean_pizza, options["format"])
+        for batch in batched(items, options["batch_size"]):
+            if options["dry_run"]:
+                existing = set(
+                    Pizza.objects.filter(
+                        name__in=[item["name"] for item in batch]
+                    ).values_list("name", flat=True)
+                )
+                updated += len(existing)
+                created += len(batch) - len(existing)
+                continue
+            for item in batch:
+                item["ingredients"] = [
+                    ingredient_ids[name] for name, _ in item["ingredients"]
+                ]
+            results = upsert_pizzas(batch)
+            created += sum(result["created"] for result in results)
+            updated += sum(not result["created"] for result in results)
+        return created, updated
+
+    def report(self, created, updated, new_ingredients, rows, start, dry_run):
+        elapsed = time.perf_counter() - start
+        verb = "Would import" if dry_run else "Imported"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {created + updated} pizza(s) ({created} created, {updated} "
+                f"updated) and {new_ingredients} new ingredient(s) from {rows} "
+                f"row(s) in {elapsed:.2f}s ({rows / elapsed:.0f} rows/s)."
+            )
+        )
+
+    def records(self, path, clean, file_format):
+        try:
+            file_format = file_format or guess_format(path)
+            for location, record in read_records(path, file_format):
+                try:
+                    yield clean(record)
+                except ValueError as exc:
+                    raise CommandError(f"{path}, {location}: {exc}")
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"{path}: {exc}")
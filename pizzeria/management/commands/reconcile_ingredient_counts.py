@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F
+
+from pizzeria.models import Ingredient
+
+
+class Command(BaseCommand):
+    help = "Recompute Ingredient.pizza_count where it drifted from the M2M links."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of ingredients updated per UPDATE statement.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report drifted ingredients without fixing them.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        drifted = list(
+            Ingredient.objects.annotate(actual=Count("pizzas"))
+            .exclude(pizza_count=F("actual"))
+            .values_list("pk", flat=True)
+        )
+
+        if not options["dry_run"]:
+            for start in range(0, len(drifted), batch_size):
+                end = start + batch_size
+                Ingredient.objects.filter(
+                    pk__in=drifted[start:end]
+                ).refresh_pizza_counts()
+
+        verb = "Found" if options["dry_run"] else "Reconciled"
+        self.stdout.write(
+            self.style.SUCCESS(f"{verb} {len(drifted)} drifted ingredient count(s).")
+        )
@@ -0,0 +1,189 @@
+import json
+import os
+import signal
+import socket
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.commands.runserver import naiveip_re
+from django.db import connections
+
+from myproject.schema import get_schema
+from myproject.serving import (
+    SharedSocketWSGIServer,
+    is_process_local_cache,
+    measure_ttfb,
+    warm_up,
+)
+from pizzeria.ingredient_index import rebuild_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Load and warm the app once, fork worker processes sharing one listening "
+        "socket and report time-to-first-byte once every worker is ready."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "addrport",
+            nargs="?",
+            default="0.0.0.0:8000",
+            help="Port number or ipaddr:port to listen on.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.SERVE_WORKERS,
+            help="Number of worker processes.",
+        )
+        parser.add_argument(
+            "--probe-path",
+            default="/api/pizzas/",
+            help="Path requested once all workers are ready to measure "
+            "time-to-first-byte; pass an empty string to skip it.",
+        )
+
+    def handle(self, *args, **options):
+        if not hasattr(os, "fork"):
+            raise CommandError("serve needs os.fork(); use runserver instead.")
+        if options["workers"] < 1:
+            raise CommandError("--workers must be at least 1.")
+        if options["workers"] > 1 and is_process_local_cache(
+            settings.PIZZERIA_CACHE_ALIAS
+        ):
+            raise CommandError(
+                f"The {settings.PIZZERIA_CACHE_ALIAS!r} cache is local to each "
+                "process, so workers would not share the menu version or the "
+                "cached responses; configure a shared CACHE_BACKEND or run a "
+                "single worker."
+            )
+        address, family = self.parse_addrport(options["addrport"])
+
+        start = time.perf_counter()
+        stats = warm_up(connect=False)
+        # Workers open their own connections; never share a connection or a
+        # pool (and its threads) across a fork.
+        connections.close_all()
+        for connection in connections.all():
+            if hasattr(connection, "close_pool"):
+                connection.close_pool()
+        self.application = stats["application"]
+        self.sock = socket.create_server(address, family=family, backlog=128)
+        self.stdout.write(
+            f"Loaded {stats['patterns']} URL patterns and {stats['serializers']} "
+            f"serializers in {stats['seconds']:.2f}s."
+        )
+        # Workers inherit the encoded OpenAPI document instead of building it.
+        self.stdout.write(f"OpenAPI schema: {get_schema().source}.")
+
+        self.stopping = False
+        self.workers = set()
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        ready_read, self.ready_write = os.pipe()
+        for _ in range(options["workers"]):
+            self.spawn_worker(report=True)
+        os.close(self.ready_write)
+        with os.fdopen(ready_read) as ready:
+            self.wait_ready(ready, options["workers"])
+
+        host, port = self.sock.getsockname()[:2]
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{options['workers']} worker(s) ready on {host}:{port} in "
+                f"{time.perf_counter() - start:.2f}s."
+            )
+        )
+        if options["probe_path"]:
+            self.probe(host, port, options["probe_path"])
+        self.supervise()
+
+    def parse_addrport(self, addrport):
+        match = naiveip_re.match(addrport)
+        if match is None:
+            raise CommandError(
+                f'"{addrport}" is not a valid port number or address:port pair.'
+            )
+        addr, _ipv4, ipv6, _fqdn, port = match.groups()
+        if ipv6:
+            return (addr[1:-1], int(port)), socket.AF_INET6
+        return (addr or "0.0.0.0", int(port)), socket.AF_INET
+
+    def spawn_worker(self, report):
+        pid = os.fork()
+        if pid:
+            self.workers.add(pid)
+            return
+
+        exit_code = 0
+        ready = False
+        try:
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            stats = warm_up()
+            if settings.PIZZERIA_INGREDIENT_INDEX:
+                rebuild_index()
+            if report:
+                self.report(
+                    {
+                        "pid": os.getpid(),
+                        "seconds": stats["seconds"],
+                        "connections": stats["connections"],
+                    }
+                )
+            ready = True
+            SharedSocketWSGIServer(self.sock, stats["application"]).serve_forever()
+        except BaseException as exc:
+            exit_code = 1
+            if report and not ready:
+                self.report({"pid": os.getpid(), "error": repr(exc)})
+        finally:
+            os._exit(exit_code)
+
+    def report(self, message):
+        os.write(self.ready_write, (json.dumps(message) + "\n").encode())
+
+    def wait_ready(self, ready, count):
+        for _ in range(count):
+            line = ready.readline()
+            message = json.loads(line) if line else {"error": "worker exited"}
+            if "error" in message:
+                self.stop()
+                self.supervise()
+                raise CommandError(f"A worker failed to start: {message['error']}")
+            self.stdout.write(
+                f"Worker {message['pid']} warmed up in {message['seconds']:.2f}s "
+                f"with {message['connections']} database connection(s)."
+            )
+
+    def probe(self, host, port, path):
+        if host in ("0.0.0.0", "::"):
+            host = "127.0.0.1" if self.sock.family == socket.AF_INET else "::1"
+        status_code, seconds = measure_ttfb((host, port), path)
+        self.stdout.write(
+            f"First request GET {path} answered {status_code} with a "
+            f"time-to-first-byte of {seconds * 1000:.1f} ms."
+        )
+
+    def stop(self, *args):
+        self.stopping = True
+        for pid in self.workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def supervise(self):
+        """Wait for the workers, replacing any that die until told to stop."""
+        while self.workers:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            self.workers.discard(pid)
+            if not self.stopping:
+                self.stderr.write(f"Worker {pid} exited ({status}); restarting it.")
+                self.spawn_worker(report=False)
+        self.sock.close()
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pizzeria", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="ingredient",
+            index=models.Index(fields=["category"], name="ingredient_category_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="ingredient",
+            index=models.Index(fields=["name"], name="ingredient_name_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="pizza",
+            index=models.Index(fields=["status", "id"], name="pizza_status_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="pizza",
+            index=models.Index(fields=["name"], name="pizza_name_idx"),
+        ),
+    ]
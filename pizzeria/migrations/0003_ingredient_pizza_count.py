@@ -0,0 +1,34 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:58
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_pizza_count(apps, schema_editor):
+    Ingredient = apps.get_model("pizzeria", "Ingredient")
+    Pizza = apps.get_model("pizzeria", "Pizza")
+    counts = (
+        Pizza.ingredients.through.objects.filter(ingredient_id=OuterRef("pk"))
+        .order_by()
+        .values("ingredient_id")
+        .annotate(count=Count("*"))
+        .values("count")
+    )
+    Ingredient.objects.update(pizza_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pizzeria", "0002_pizza_ingredient_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ingredient",
+            name="pizza_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_pizza_count, migrations.RunPython.noop),
+    ]
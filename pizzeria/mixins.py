@@ -0,0 +1,142 @@
+import hashlib
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from .caching import aget_menu_version, get_menu_version
+from .fast_reads import get_row_serializer
+
+
+class ConditionalGetMixin:
+    """
+    Answer ``If-None-Match``/``If-Modified-Since`` from the menu version.
+
+    A matching request gets a 304 before the queryset or the serializers run.
+    The ETag also covers the audience (staff sees inactive pizzas), the full
+    URL and the negotiated media type, so those variants never share one.
+    """
+
+    def get_validator_variant(self, request):
+        user = request.user
+        if user.is_authenticated and (user.is_staff or user.is_superuser):
+            return "staff"
+        return "public"
+
+    def get_etag(self, request, version):
+        key = "|".join(
+            [
+                version,
+                self.get_validator_variant(request),
+                request.get_full_path(),
+                request.accepted_media_type or "",
+            ]
+        )
+        return '"%s"' % hashlib.md5(key.encode()).hexdigest()
+
+    def get_not_modified_response(self, request):
+        """Return a 304 response if the client's validators still match."""
+        return self.check_validators(request, get_menu_version())
+
+    async def aget_not_modified_response(self, request):
+        """Async ``get_not_modified_response()`` for coroutine handlers."""
+        return self.check_validators(request, await aget_menu_version())
+
+    def check_validators(self, request, marker):
+        self.validators = (self.get_etag(request, marker["version"]), marker)
+        return get_conditional_response(
+            request, etag=self.validators[0], last_modified=marker["last_modified"]
+        )
+
+    def add_validators(self, response):
+        etag, marker = self.validators
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response["ETag"] = etag
+            response["Last-Modified"] = http_date(marker["last_modified"])
+            patch_vary_headers(response, ["Accept", "Authorization"])
+        return response
+
+    def get(self, request, *args, **kwargs):
+        response = self.get_not_modified_response(request)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        return self.add_validators(response)
+
+
+class FieldSelectionMixin:
+    """
+    Let read requests pick serializer fields with ``?fields=`` and ``?expand=``.
+
+    Both take comma-separated field names (see
+    ``SelectableFieldsMixin.select_fields``). Views use
+    ``get_selected_fields()`` to annotate and prefetch only what the response
+    needs. Writes always use the full serializer.
+    """
+
+    def get_selected_fields(self):
+        if not hasattr(self, "_selected_fields"):
+            serializer_class = self.get_serializer_class()
+            if self.request.method in SAFE_METHODS:
+                params = self.request.query_params
+                self._selected_fields = serializer_class.select_fields(
+                    self._split(params.get("fields")), self._split(params.get("expand"))
+                )
+            else:
+                self._selected_fields = serializer_class.select_fields()
+        return self._selected_fields
+
+    def selects_default_fields(self):
+        return self.get_selected_fields() == self.get_serializer_class().select_fields()
+
+    def get_serializer(self, *args, **kwargs):
+        if self.request.method in SAFE_METHODS:
+            kwargs.setdefault("fields", self.get_selected_fields())
+        return super().get_serializer(*args, **kwargs)
+
+    @staticmethod
+    def _split(value):
+        names = [name.strip() for name in (value or "").split(",") if name.strip()]
+        return names or None
+
+
+class FastListMixin:
+    """
+    Build list pages from ``values()`` rows when ``PIZZERIA_FAST_READS`` is on.
+
+    The rows are rendered by a compiled ``RowSerializer``, so no model
+    instances or serializer passes are created; the output is byte-for-byte
+    what the serializer would produce. Selections the row serializer cannot
+    express (nested or relational fields) use the serializer as before.
+    """
+
+    def get_row_serializer(self):
+        if not settings.PIZZERIA_FAST_READS:
+            return None
+        return get_row_serializer(
+            self.get_serializer_class(), tuple(self.get_selected_fields())
+        )
+
+    def get_list_queryset(self, row_serializer):
+        queryset = self.filter_queryset(self.get_queryset())
+        if row_serializer is not None:
+            # The cursor paginator reads its position from ``id``.
+            queryset = queryset.values(*dict.fromkeys(["id", *row_serializer.values]))
+        return queryset
+
+    def serialize_page(self, page, row_serializer):
+        if row_serializer is not None:
+            return row_serializer.render(page)
+        return self.get_serializer(page, many=True).data
+
+    def list(self, request, *args, **kwargs):
+        row_serializer = self.get_row_serializer()
+        queryset = self.get_list_queryset(row_serializer)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                self.serialize_page(page, row_serializer)
+            )
+        return Response(self.serialize_page(queryset, row_serializer))
@@ -1,4 +1,33 @@
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+class PizzaQuerySet(models.QuerySet):
+    def with_ingredients_count(self):
+        # A correlated subquery instead of JOIN + GROUP BY keeps the rows in
+        # index order, so ORDER BY id LIMIT n stops after n rows.
+        counts = (
+            Pizza.ingredients.through.objects.filter(pizza_id=OuterRef("pk"))
+            .order_by()
+            .values("pizza_id")
+            .annotate(count=Count("*"))
+            .values("count")
+        )
+        return self.annotate(ingredients_count=Coalesce(Subquery(counts), 0))
+
+
+class IngredientQuerySet(models.QuerySet):
+    def refresh_pizza_counts(self):
+        """Recompute ``pizza_count`` for these ingredients in one UPDATE."""
+        counts = (
+            Pizza.ingredients.through.objects.filter(ingredient_id=OuterRef("pk"))
+            .order_by()
+            .values("ingredient_id")
+            .annotate(count=Count("*"))
+            .values("count")
+        )
+        return self.update(pizza_count=Coalesce(Subquery(counts), 0))
 
 
 class Pizza(models.Model):
@@ -12,6 +41,14 @@ class Pizza(models.Model):
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="active")
     ingredients = models.ManyToManyField("Ingredient", related_name="pizzas")
 
+    objects = PizzaQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "id"], name="pizza_status_id_idx"),
+            models.Index(fields=["name"], name="pizza_name_idx"),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -26,6 +63,16 @@ class Ingredient(models.Model):
     category = models.CharField(
         max_length=10, choices=CATEGORY_CHOICES, default="basic"
     )
+    # Number of pizzas using this ingredient, maintained by pizzeria.signals.
+    pizza_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = IngredientQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["category"], name="ingredient_category_idx"),
+            models.Index(fields=["name"], name="ingredient_name_idx"),
+        ]
 
     def __str__(self):
         return self.name
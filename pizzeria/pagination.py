@@ -0,0 +1,16 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class CatalogCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the primary key.
+
+    Each page is fetched with ``WHERE id > <cursor> ORDER BY id LIMIT n``, so
+    deep pages cost the same as the first one.
+    """
+
+    ordering = "id"
+    page_size = settings.PIZZERIA_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = settings.PIZZERIA_MAX_PAGE_SIZE
@@ -1,33 +1,178 @@
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
 from rest_framework import serializers
+
+from .bulk import set_pizza_ingredients, upsert_pizzas
 from .models import Pizza, Ingredient
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class SelectableFieldsMixin:
+    """
+    Serialize only the fields passed as ``fields=[...]``.
+
+    Fields listed in ``Meta.expandable_fields`` are left out unless selected;
+    the others are the default. Dropped fields are never evaluated, so their
+    method fields and related lookups cost nothing.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def select_fields(cls, fields=None, expand=None):
+        """
+        Resolve ``?fields=`` and ``?expand=`` values into field names.
+
+        ``fields`` replaces the defaults, ``expand`` adds expandable fields to
+        them. Unknown names raise ``ValidationError``.
+        """
+        available = list(cls.Meta.fields)
+        expandable = list(getattr(cls.Meta, "expandable_fields", []))
+        errors = {}
+        unknown = sorted(set(fields or []) - set(available))
+        if unknown:
+            errors["fields"] = ["Unknown field(s): " + ", ".join(unknown)]
+        unknown = sorted(set(expand or []) - set(expandable))
+        if unknown:
+            errors["expand"] = ["Not expandable: " + ", ".join(unknown)]
+        if errors:
+            raise serializers.ValidationError(errors)
+
+        if fields is None:
+            fields = [name for name in available if name not in expandable]
+        selected = set(fields) | set(expand or [])
+        return [name for name in available if name in selected]
+
+
+class IngredientSummarySerializer(serializers.ModelSerializer):
     class Meta:
         model = Ingredient
         fields = ["id", "name", "category"]
 
 
-class PizzaSerializer(serializers.ModelSerializer):
+class IngredientSerializer(SelectableFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Ingredient
+        fields = ["id", "name", "category", "pizza_count"]
+        read_only_fields = ["pizza_count"]
+
+
+class PizzaSerializer(SelectableFieldsMixin, serializers.ModelSerializer):
     ingredients_count = serializers.SerializerMethodField()
+    ingredients = IngredientSummarySerializer(many=True, read_only=True)
 
     class Meta:
         model = Pizza
-        fields = ["name", "price", "ingredients_count"]
+        fields = ["name", "price", "ingredients_count", "ingredients"]
+        expandable_fields = ["ingredients"]
+        # Column read by the fast list path (see pizzeria.fast_reads).
+        row_sources = {"ingredients_count": "ingredients_count"}
 
     def get_ingredients_count(self, obj):
-        return obj.ingredients.count()
+        # PizzaListView annotates the count; fall back to a query otherwise.
+        count = getattr(obj, "ingredients_count", None)
+        if count is None:
+            count = obj.ingredients.count()
+        return count
 
 
-class PizzaDetailSerializer(serializers.ModelSerializer):
-    ingredients = IngredientSerializer(many=True, read_only=True)
+class PizzaDetailSerializer(SelectableFieldsMixin, serializers.ModelSerializer):
+    # The summary omits pizza_count, which changes when other pizzas change and
+    # would defeat the per-pizza detail cache.
+    ingredients = IngredientSummarySerializer(many=True, read_only=True)
 
     class Meta:
         model = Pizza
         fields = ["name", "price", "status", "ingredients"]
 
 
+class PizzaExportSerializer(PizzaDetailSerializer):
+    class Meta(PizzaDetailSerializer.Meta):
+        fields = ["id", "name", "price", "status", "ingredients"]
+
+
 class PizzaCreateUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Pizza
         fields = ["name", "price", "status", "ingredients"]
+
+    def update(self, instance, validated_data):
+        # Write only what changed: the columns that differ and the ingredient
+        # delta. An update that changes nothing touches no rows and fires no
+        # signals, so caches and the menu version stay valid.
+        ingredients = validated_data.pop("ingredients", None)
+        changed = [
+            field
+            for field, value in validated_data.items()
+            if getattr(instance, field) != value
+        ]
+        with transaction.atomic():
+            if changed:
+                for field in changed:
+                    setattr(instance, field, validated_data[field])
+                instance.save(update_fields=changed)
+            if ingredients is not None:
+                set_pizza_ingredients(
+                    instance, [ingredient.pk for ingredient in ingredients]
+                )
+        return instance
+
+
+class PizzaIngredientsBatchSerializer(serializers.Serializer):
+    add = serializers.ListField(child=serializers.IntegerField(), default=list)
+    remove = serializers.ListField(child=serializers.IntegerField(), default=list)
+
+    def validate(self, attrs):
+        overlap = set(attrs["add"]) & set(attrs["remove"])
+        if overlap:
+            raise serializers.ValidationError(
+                "Ingredients cannot be added and removed in the same request: "
+                + ", ".join(str(pk) for pk in sorted(overlap))
+            )
+        return attrs
+
+
+class PizzaBulkListSerializer(serializers.ListSerializer):
+    def validate(self, attrs):
+        duplicates = [
+            name for name, n in Counter(i["name"] for i in attrs).items() if n > 1
+        ]
+        if duplicates:
+            raise serializers.ValidationError(
+                "Duplicate pizza names in request: " + ", ".join(sorted(duplicates))
+            )
+
+        requested = {pk for item in attrs for pk in item["ingredients"]}
+        found = set(
+            Ingredient.objects.filter(pk__in=requested).values_list("pk", flat=True)
+        )
+        missing = sorted(requested - found)
+        if missing:
+            raise serializers.ValidationError(
+                "Some ingredients do not exist: " + ", ".join(str(pk) for pk in missing)
+            )
+        return attrs
+
+    def create(self, validated_data):
+        return upsert_pizzas(validated_data)
+
+
+class PizzaBulkSerializer(serializers.ModelSerializer):
+    ingredients = serializers.ListField(child=serializers.IntegerField())
+
+    class Meta:
+        model = Pizza
+        fields = ["name", "price", "status", "ingredients"]
+        extra_kwargs = {"status": {"required": False}}
+        list_serializer_class = PizzaBulkListSerializer
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        kwargs.setdefault("allow_empty", False)
+        kwargs.setdefault("max_length", settings.PIZZERIA_BULK_MAX_ITEMS)
+        return super().many_init(*args, **kwargs)
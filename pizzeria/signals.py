@@ -0,0 +1,117 @@
+from django.core.signals import request_finished
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import Signal, receiver
+
+from .caching import bump_menu_version, invalidate_pizza_details
+from .ingredient_index import rebuild_pending_index, update_index
+from .models import Ingredient, Pizza
+
+PizzaIngredient = Pizza.ingredients.through
+
+# Sent after bulk writes that bypass the model and M2M signals, with the ids of
+# every pizza and ingredient whose rows or links may have changed.
+pizzas_bulk_changed = Signal()
+
+
+def _ingredient_ids_for_pizza(pizza_pk):
+    return list(
+        PizzaIngredient.objects.filter(pizza_id=pizza_pk).values_list(
+            "ingredient_id", flat=True
+        )
+    )
+
+
+def _pizza_ids_for_ingredient(ingredient_pk):
+    return list(
+        PizzaIngredient.objects.filter(ingredient_id=ingredient_pk).values_list(
+            "pizza_id", flat=True
+        )
+    )
+
+
+def refresh_pizza_counts(ingredient_ids):
+    if ingredient_ids:
+        Ingredient.objects.filter(pk__in=ingredient_ids).refresh_pizza_counts()
+
+
+@receiver(post_save, sender=Pizza)
+def pizza_saved(sender, instance, **kwargs):
+    invalidate_pizza_details([instance.pk])
+    update_index([instance.pk])
+    bump_menu_version()
+
+
+@receiver(pre_delete, sender=Pizza)
+def pizza_deleting(sender, instance, **kwargs):
+    instance._deleted_ingredient_ids = _ingredient_ids_for_pizza(instance.pk)
+
+
+@receiver(post_delete, sender=Pizza)
+def pizza_deleted(sender, instance, **kwargs):
+    invalidate_pizza_details([instance.pk])
+    refresh_pizza_counts(getattr(instance, "_deleted_ingredient_ids", []))
+    update_index([instance.pk], getattr(instance, "_deleted_ingredient_ids", []))
+    bump_menu_version()
+
+
+@receiver(m2m_changed, sender=PizzaIngredient)
+def pizza_ingredients_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action.startswith("post_"):
+        bump_menu_version()
+    if not reverse:
+        if action == "pre_clear":
+            instance._cleared_ingredient_ids = _ingredient_ids_for_pizza(instance.pk)
+        elif action == "post_clear":
+            invalidate_pizza_details([instance.pk])
+            refresh_pizza_counts(getattr(instance, "_cleared_ingredient_ids", []))
+            update_index(
+                [instance.pk], getattr(instance, "_cleared_ingredient_ids", [])
+            )
+        elif action in ("post_add", "post_remove"):
+            invalidate_pizza_details([instance.pk])
+            refresh_pizza_counts(pk_set)
+            update_index([instance.pk], pk_set)
+    elif action == "pre_clear":
+        instance._cleared_pizza_ids = _pizza_ids_for_ingredient(instance.pk)
+    elif action == "post_clear":
+        invalidate_pizza_details(getattr(instance, "_cleared_pizza_ids", []))
+        refresh_pizza_counts([instance.pk])
+        update_index(getattr(instance, "_cleared_pizza_ids", []), [instance.pk])
+    elif action in ("post_add", "post_remove"):
+        invalidate_pizza_details(pk_set)
+        refresh_pizza_counts([instance.pk])
+        update_index(pk_set, [instance.pk])
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_saved(sender, instance, created, **kwargs):
+    bump_menu_version()
+    if not created:
+        invalidate_pizza_details(_pizza_ids_for_ingredient(instance.pk))
+
+
+@receiver(pre_delete, sender=Ingredient)
+def ingredient_deleting(sender, instance, **kwargs):
+    instance._deleted_pizza_ids = _pizza_ids_for_ingredient(instance.pk)
+
+
+@receiver(post_delete, sender=Ingredient)
+def ingredient_deleted(sender, instance, **kwargs):
+    invalidate_pizza_details(getattr(instance, "_deleted_pizza_ids", []))
+    update_index(getattr(instance, "_deleted_pizza_ids", []), [instance.pk])
+    bump_menu_version()
+
+
+@receiver(pizzas_bulk_changed)
+def pizzas_bulk_updated(sender, pizza_ids, ingredient_ids, **kwargs):
+    invalidate_pizza_details(pizza_ids)
+    refresh_pizza_counts(ingredient_ids)
+    update_index(pizza_ids, ingredient_ids)
+    bump_menu_version()
+
+
+@receiver(request_finished)
+def request_done(sender, **kwargs):
+    # Rebuild an out-of-date ingredient index after the response is sent
+    # rather than while a filtered request waits for it.
+    rebuild_pending_index()
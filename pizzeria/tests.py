@@ -1,8 +1,30 @@
+import csv
+import json
+import random
+from collections import Counter
+from decimal import Decimal
+from io import StringIO
+
 import pytest
+from rest_framework.pagination import Cursor
 from rest_framework.test import APIClient
 from rest_framework import status
 from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from .bulk import set_pizza_ingredients, upsert_pizzas
+from .caching import get_pizza_detail, next_index_generation
+from .ingredient_index import (
+    IngredientIndex,
+    get_index,
+    ids_after,
+    ids_before,
+    rebuild_index,
+    to_bitset,
+)
 from .models import Pizza, Ingredient
+from .pagination import CatalogCursorPagination
 from .serializers import PizzaSerializer
 
 User = get_user_model()
@@ -132,17 +154,23 @@ def test_pizza_list_view(api_client, create_pizza_with_ingredients):
     response = api_client.get(url)
 
     assert response.status_code == status.HTTP_200_OK
-    assert len(response.data) == 3
+    assert len(response.data["results"]) == 3
 
-    pizza1_data = next(item for item in response.data if item["name"] == "Margherita")
+    pizza1_data = next(
+        item for item in response.data["results"] if item["name"] == "Margherita"
+    )
     assert pizza1_data["price"] == "10.50"
     assert pizza1_data["ingredients_count"] == 2
 
-    pizza2_data = next(item for item in response.data if item["name"] == "Pepperoni")
+    pizza2_data = next(
+        item for item in response.data["results"] if item["name"] == "Pepperoni"
+    )
     assert pizza2_data["price"] == "12.00"
     assert pizza2_data["ingredients_count"] == 3
 
-    pizza3_data = next(item for item in response.data if item["name"] == "Hawaiian")
+    pizza3_data = next(
+        item for item in response.data["results"] if item["name"] == "Hawaiian"
+    )
     assert pizza3_data["price"] == "11.00"
     assert pizza3_data["ingredients_count"] == 3
 
@@ -154,7 +182,7 @@ def test_pizza_list_view_no_pizzas(api_client):
     response = api_client.get(url)
 
     assert response.status_code == status.HTTP_200_OK
-    assert len(response.data) == 0
+    assert len(response.data["results"]) == 0
 
 
 @pytest.mark.django_db
@@ -276,9 +304,9 @@ def test_ingredient_list_create_as_staff(api_client, create_staff_user):
     response = api_client.get(url)
 
     assert response.status_code == status.HTTP_200_OK
-    assert len(response.data) == 2
-    assert response.data[0]["name"] == "Tomato"
-    assert response.data[1]["name"] == "Cheese"
+    assert len(response.data["results"]) == 2
+    assert response.data["results"][0]["name"] == "Tomato"
+    assert response.data["results"][1]["name"] == "Cheese"
 
     new_ingredient_data = {"name": "Pepperoni", "category": "premium"}
     response = api_client.post(url, new_ingredient_data, format="json")
@@ -565,3 +593,1467 @@ def test_remove_ingredient_not_on_pizza(api_client, create_staff_user):
     assert pizza.ingredients.count() == 1
     assert ingredient1 in pizza.ingredients.all()
     assert ingredient2 not in pizza.ingredients.all()
+
+
+@pytest.mark.django_db
+def test_pizza_list_view_query_count_is_constant(
+    api_client, create_pizza_with_ingredients, django_assert_num_queries
+):
+    """Test that listing pizzas runs a single query regardless of row count."""
+    create_pizza_with_ingredients("Margherita", 10.50, ["Tomato", "Cheese"])
+
+    with django_assert_num_queries(1):
+        response = api_client.get("/api/pizzas/")
+    assert response.status_code == status.HTTP_200_OK
+
+    for i in range(10):
+        create_pizza_with_ingredients(f"Pizza {i}", 9.00, [f"Ing {i}a", f"Ing {i}b"])
+
+    with django_assert_num_queries(1):
+        response = api_client.get("/api/pizzas/")
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.data["results"]) == 11
+
+
+@pytest.mark.django_db
+def test_pizza_list_view_query_count_as_staff(
+    api_client,
+    create_staff_user,
+    create_pizza_with_ingredients,
+    django_assert_num_queries,
+):
+    """Test that the staff listing (all pizzas) also runs a single query."""
+    staff_user = create_staff_user("staffuser")
+    api_client.force_authenticate(user=staff_user)
+
+    for i in range(5):
+        pizza = create_pizza_with_ingredients(f"Pizza {i}", 9.00, [f"Ing {i}"])
+        if i % 2:
+            pizza.status = "inactive"
+            pizza.save()
+
+    with django_assert_num_queries(1):
+        response = api_client.get("/api/pizzas/")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.data["results"]) == 5
+    assert all(item["ingredients_count"] == 1 for item in response.data["results"])
+
+
+@pytest.mark.django_db
+def test_pizza_list_view_counts_pizzas_without_ingredients(api_client):
+    """Test that the annotated count is zero for pizzas without ingredients."""
+    Pizza.objects.create(name="Plain", price=5.00)
+
+    response = api_client.get("/api/pizzas/")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["results"][0]["ingredients_count"] == 0
+
+
+@pytest.mark.django_db
+def test_pizza_detail_view_is_cached(
+    api_client, create_pizza_with_ingredients, django_assert_num_queries
+):
+    """Test that repeated detail reads are served from the cache."""
+    pizza = create_pizza_with_ingredients("Margherita", 10.50, ["Tomato", "Cheese"])
+    url = f"/api/pizzas/{pizza.id}/"
+
+    with django_assert_num_queries(2):
+        first = api_client.get(url)
+    with django_assert_num_queries(0):
+        second = api_client.get(url)
+
+    assert first.status_code == status.HTTP_200_OK
+    assert second.status_code == status.HTTP_200_OK
+    assert first.data == second.data
+    assert [i["name"] for i in second.data["ingredients"]] == ["Tomato", "Cheese"]
+
+
+@pytest.mark.django_db
+def test_pizza_detail_cache_invalidated_on_pizza_save(api_client):
+    """Test that saving a pizza invalidates its cached detail payload."""
+    pizza = Pizza.objects.create(name="Margherita", price=10.50)
+    url = f"/api/pizzas/{pizza.id}/"
+    api_client.get(url)
+
+    pizza.price = 12.00
+    pizza.save()
+
+    response = api_client.get(url)
+    assert response.data["price"] == "12.00"
+
+
+@pytest.mark.django_db
+def test_pizza_detail_cache_invalidated_on_ingredient_changes(
+    api_client, create_staff_user
+):
+    """Test that add/remove endpoints and ingredient edits refresh the detail payload."""
+    staff_user = create_staff_user("staffuser")
+    pizza = Pizza.objects.create(name="Margherita", price=10.50)
+    tomato = Ingredient.objects.create(name="Tomato")
+    url = f"/api/pizzas/{pizza.id}/"
+    assert api_client.get(url).data["ingredients"] == []
+
+    api_client.force_authenticate(user=staff_user)
+    api_client.post(f"/api/pizzas/{pizza.id}/add_ingredient/{tomato.id}/")
+    assert [i["name"] for i in api_client.get(url).data["ingredients"]] == ["Tomato"]
+
+    api_client.put(
+        f"/api/ingredients/{tomato.id}/",
+        {"name": "Roma Tomato", "category": "premium"},
+        format="json",
+    )
+    ingredients = api_client.get(url).data["ingredients"]
+    assert ingredients[0]["name"] == "Roma Tomato"
+    assert ingredients[0]["category"] == "premium"
+
+    api_client.delete(f"/api/pizzas/{pizza.id}/remove_ingredient/{tomato.id}/")
+    assert api_client.get(url).data["ingredients"] == []
+
+
+@pytest.mark.django_db
+def test_pizza_detail_cache_invalidated_on_reverse_clear(api_client):
+    """Test that clearing an ingredient's pizzas invalidates those pizzas."""
+    pizza = Pizza.objects.create(name="Margherita", price=10.50)
+    tomato = Ingredient.objects.create(name="Tomato")
+    pizza.ingredients.add(tomato)
+    url = f"/api/pizzas/{pizza.id}/"
+    assert len(api_client.get(url).data["ingredients"]) == 1
+
+    tomato.pizzas.clear()
+
+    assert api_client.get(url).data["ingredients"] == []
+
+
+@pytest.mark.django_db
+def test_pizza_list_view_cursor_pagination(api_client):
+    """Test walking the pizza list page by page with the cursor links."""
+    Pizza.objects.bulk_create(Pizza(name=f"Pizza {i}", price=9.00) for i in range(7))
+
+    names = []
+    url = "/api/pizzas/?page_size=3"
+    while url:
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data["results"]) <= 3
+        names.extend(item["name"] for item in response.data["results"])
+        url = response.data["next"]
+
+    assert names == [f"Pizza {i}" for i in range(7)]
+
+
+@pytest.mark.django_db
+def test_pizza_list_view_deep_page_query_count(api_client, django_assert_num_queries):
+    """Test that a later page costs the same single query as the first."""
+    Pizza.objects.bulk_create(Pizza(name=f"Pizza {i}", price=9.00) for i in range(20))
+    response = api_client.get("/api/pizzas/?page_size=5")
+    next_url = api_client.get(response.data["next"]).data["next"]
+
+    with django_assert_num_queries(1):
+        response = api_client.get(next_url)
+
+    assert [item["name"] for item in response.data["results"]] == [
+        f"Pizza {i}" for i in range(10, 15)
+    ]
+
+
+@pytest.mark.django_db
+def test_pizza_list_view_page_size_is_capped(api_client, monkeypatch):
+    """Test that page_size cannot exceed the configured maximum."""
+    Pizza.objects.bulk_create(Pizza(name=f"Pizza {i}", price=9.00) for i in range(5))
+    monkeypatch.setattr(CatalogCursorPagination, "max_page_size", 2)
+
+    response = api_client.get("/api/pizzas/?page_size=100")
+
+    assert len(response.data["results"]) == 2
+    assert response.data["next"] is not None
+
+
+@pytest.mark.django_db
+def test_ingredient_list_cursor_pagination(api_client, create_staff_user):
+    """Test that the ingredient list is paginated in id order."""
+    staff_user = create_staff_user("staffuser")
+    api_client.force_authenticate(user=staff_user)
+    Ingredient.objects.bulk_create(Ingredient(name=f"Ing {i}") for i in range(4))
+
+    response = api_client.get("/api/ingredients/?page_size=3")
+    assert [item["name"] for item in response.data["results"]] == [
+        "Ing 0",
+        "Ing 1",
+        "Ing 2",
+    ]
+
+    response = api_client.get(response.data["next"])
+    assert [item["name"] for item in response.data["results"]] == ["Ing 3"]
+    assert response.data["next"] is None
+    assert response.data["previous"] is not None
+
+
+@pytest.mark.django_db
+def test_batch_ingredients_as_staff(
+    api_client, create_staff_user, django_assert_max_num_queries
+):
+    """Test adding and removing several ingredients in one request."""
+    staff_user = create_staff_user("staffuser")
+    api_client.force_authenticate(user=staff_user)
+
+    pizza = Pizza.objects.create(name="Margherita", price=10.50)
+    ingredients = [Ingredient.objects.create(name=f"Ing {i}") for i in range(12)]
+    pizza.ingredients.add(ingredients[0], ingredients[1])
+
+    url = f"/api/pizzas/{pizza.id}/ingredients/"
+    data = {
+        "add": [ingredient.id for ingredient in ingredients[2:]],
+        "remove": [ingredients[0].id],
+    }
+    with django_assert_max_num_queries(10):
+        response = api_client.post(url, data, format="json")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["added"] == sorted(data["add"])
+    assert response.data["removed"] == [ingredients[0].id]
+    assert set(pizza.ingredients.values_list("id", flat=True)) == {
+        ingredient.id for ingredient in ingredients[1:]
+    }
+
+
+@pytest.mark.django_db
+def test_batch_ingredients_reports_missing_ids(api_client, create_staff_user):
+    """Test that unknown ingredient ids are reported and nothing is applied."""
+    staff_user = create_staff_user("staffuser")
+    api_client.force_authenticate(user=staff_user)
+
+    pizza = Pizza.objects.create(name="Margherita", price=10.50)
+    tomato = Ingredient.objects.create(name="Tomato")
+
+    url = f"/api/pizzas/{pizza.id}/ingredients/"
+    response = api_client.post(
+        url, {"add": [tomato.id, 998], "remove": [999]}, format="json"
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.data["missing"] == [998, 999]
+    assert pizza.ingredients.count() == 0
+
+
+@pytest.mark.django_db
+def test_batch_ingredients_rejects_overlap(api_client, create_staff_user):
+    """Test that an id cannot be both added and removed."""
+    staff_user = create_staff_user("staffuser")
+    api_client.force_authenticate(user=staff_user)
+
+    pizza = Pizza.objects.create(name="Margherita", price=10.50)
+    tomato = Ingredient.objects.create(name="Tomato")
+
+    url = f"/api/pizzas/{pizza.id}/ingredients/"
+    response = api_client.post(
+        url, {"add": [tomato.id], "remove": [tomato.id]}, format="json"
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert pizza.ingredients.count() == 0
+
+
+@pytest.mark.django_db
+def test_batch_ingredients_as_regular_user(api_client, create_user):
+    """Test that the batch endpoint is forbidden for regular users."""
+    regular_user = create_user("regularuser")
+    api_client.force_authenticate(user=regular_user)
+
+    pizza = Pizza.objects.create(name="Margherita", price=10.50)
+    tomato = Ingredient.objects.create(name="Tomato")
+
+    url = f"/api/pizzas/{pizza.id}/ingredients/"
+    response = api_client.post(url, {"add": [tomato.id]}, format="json")
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    assert pizza.ingredients.count() == 0
+
+
+@pytest.mark.django_db
+def test_bulk_upsert_pizzas_as_staff(api_client, create_staff_user):
+    """Test creating and updating pizzas by name in one request."""
+    staff_user = create_staff_user("staffuser")
+    api_client.force_authenticate(user=staff_user)
+
+    tomato = Ingredient.objects.create(name="Tomato")
+    cheese = Ingredient.objects.create(name="Cheese")
+    ham = Ingredient.objects.create(name="Ham")
+    margherita = Pizza.objects.create(name="Margherita", price=10.50)
+    margherita.ingredients.add(tomato)
+
+    data = [
+        {"name": "Margherita", "price": "11.00", "ingredients": [tomato.id, cheese.id]},
+        {
+            "name": "Hawaiian",
+            "price": "12.00",
+            "status": "inactive",
+            "ingredients": [ham.id, cheese.id],
+        },
+    ]
+    response = api_client.post("/api/pizzas/bulk/", data, format="json")
+
+    assert response.status_code == status.HTTP_200_OK
+    hawaiian = Pizza.objects.get(name="Hawaiian")
+    assert response.data == [
+        {"id": margherita.id, "name": "Margherita", "created": False},
+        {"id": hawaiian.id, "name": "Hawaiian", "created": True},
+    ]
+    margherita.refresh_from_db()
+    assert margherita.price == 11.00
+    assert margherita.status == "active"
+    assert set(margherita.ingredients.all()) == {tomato, cheese}
+    assert hawaiian.status == "inactive"
+    assert set(hawaiian.ingredients.all()) == {ham, cheese}
+
+
+@pytest.mark.django_db
+def test_bulk_upsert_query_count_is_constant(
+    api_client, create_staff_user, django_assert_num_queries
+):
+    """Test that the bulk upsert runs the same queries for 2 or 50 pizzas."""
+    staff_user = create_staff_user("staffuser")
+    api_client.force_authenticate(user=staff_user)
+    ingredients = [Ingredient.objects.create(name=f"Ing {i}") for i in range(5)]
+    ingredient_ids = [ingredient.id for ingredient in ingredients]
+
+    def payload(count):
+        return [
+            {"name": f"Pizza {i}", "price": "9.00", "ingredients": ingredient_ids}
+            for i in range(count)
+        ]
+
+    api_client.post("/api/pizzas/bulk/", payload(1), format="json")
+    with django_assert_num_queries(10) as small:
+        api_client.post("/api/pizzas/bulk/", payload(2), format="json")
+    with django_assert_num_queries(len(small.captured_queries)):
+        response = api_client.post("/api/pizzas/bulk/", payload(50), format="json")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert Pizza.objects.count() == 50
+    assert Pizza.ingredients.through.objects.count() == 250
+
+
+@pytest.mark.django_db
+def test_bulk_upsert_rejects_invalid_payload(api_client, create_staff_user):
+    """Test that duplicate names or unknown ingredients reject the whole batch."""
+    staff_user = create_staff_user("staffuser")
+    api_client.force_authenticate(user=staff_user)
+    tomato = Ingredient.objects.create(name="Tomato")
+
+    duplicated = [
+        {"name": "Margherita", "price": "10.00", "ingredients": [tomato.id]},
+        {"name": "Margherita", "price": "11.00", "ingredients": []},
+    ]
+    response = api_client.post("/api/pizzas/bulk/", duplicated, format="json")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    unknown = [{"name": "Margherita", "price": "10.00", "ingredients": [999]}]
+    response = api_client.post("/api/pizzas/bulk/", unknown, format="json")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "999" in response.content.decode("utf-8")
+    assert Pizza.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_bulk_upsert_invalidates_detail_cache(api_client, create_staff_user):
+    """Test that bulk updates refresh cached pizza details."""
+    pizza = Pizza.objects.create(name="Margherita", price=10.50)
+    url = f"/api/pizzas/{pizza.id}/"
+    api_client.get(url)
+
+    staff_user = create_staff_user("staffuser")
+    api_client.force_authenticate(user=staff_user)
+    data = [{"name": "Margherita", "price": "13.00", "ingredients": []}]
+    api_client.post("/api/pizzas/bulk/", data, format="json")
+
+    assert api_client.get(url).data["price"] == "13.00"
+
+
+def _insert_link_first(pizza_name, ingredient):
+    """Execute wrapper inserting a link just before the bulk link INSERT runs."""
+    table = Pizza.ingredients.through._meta.db_table
+    raced = []
+
+    def wrapper(execute, sql, params, many, context):
+        if not raced and sql.startswith("INSERT") and table in sql:
+            raced.append(True)
+            Pizza.objects.get(name=pizza_name).ingredients.add(ingredient)
+        return execute(sql, params, many, context)
+
+    return wrapper
+
+
+@pytest.mark.django_db
+def test_link_writes_tolerate_concurrent_inserts():
+    """Test that a link inserted by a concurrent write is not a conflict."""
+    tomato = Ingredient.objects.create(name="Tomato")
+    cheese = Ingredient.objects.create(name="Cheese")
+    pizza = Pizza.objects.create(name="Margherita", price=10)
+
+    with connection.execute_wrapper(_insert_link_first("Margherita", tomato)):
+        set_pizza_ingredients(pizza, [tomato.id, cheese.id])
+    assert set(pizza.ingredients.values_list("name", flat=True)) == {
+        "Tomato",
+        "Cheese",
+    }
+
+    with connection.execute_wrapper(_insert_link_first("Margherita", cheese)):
+        upsert_pizzas([{"name": "Margherita", "price": 11, "ingredients": [cheese.id]}])
+    assert list(pizza.ingredients.values_list("name", flat=True)) == ["Cheese"]
+
+
+@pytest.mark.django_db
+def test_bulk_upsert_as_regular_user(api_client, create_user):
+    """Test that the bulk endpoint is forbidden for regular users."""
+    regular_user = create_user("regularuser")
+    api_client.force_authenticate(user=regular_user)
+
+    data = [{"name": "Margherita", "price": "10.00", "ingredients": []}]
+    response = api_client.post("/api/pizzas/bulk/", data, format="json")
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    assert Pizza.objects.count() == 0
+
+
+def _export(api_client, export_format):
+    response = api_client.get(f"/api/pizzas/export.{export_format}")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.streaming
+    return response, b"".join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db
+def test_export_pizzas_as_ndjson(api_client, create_staff_user):
+    """Test that the export streams every pizza with its ingredients."""
+    tomato = Ingredient.objects.create(name="Tomato")
+    basil = Ingredient.objects.create(name="Basil", category="premium")
+    margherita = Pizza.objects.create(name="Margherita", price=10.50)
+    margherita.ingredients.set([basil, tomato])
+    Pizza.objects.create(name="Old", price=8.00, status="inactive")
+    api_client.force_authenticate(user=create_staff_user("staffuser"))
+
+    response, body = _export(api_client, "ndjson")
+
+    assert response["Content-Type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in body.splitlines()]
+    assert [row["name"] for row in rows] == ["Margherita", "Old"]
+    assert rows[0] == {
+        "id": margherita.id,
+        "name": "Margherita",
+        "price": "10.50",
+        "status": "active",
+        "ingredients": [
+            {"id": tomato.id, "name": "Tomato", "category": "basic"},
+            {"id": basil.id, "name": "Basil", "category": "premium"},
+        ],
+    }
+    assert rows[1]["ingredients"] == []
+
+
+@pytest.mark.django_db
+def test_export_pizzas_as_csv(api_client, create_staff_user):
+    """Test the CSV export layout."""
+    pizza = Pizza.objects.create(name="Margherita, classic", price=10.50)
+    tomato = Ingredient.objects.create(name="Tomato")
+    cheese = Ingredient.objects.create(name="Mozzarella")
+    pizza.ingredients.set([tomato, cheese])
+    api_client.force_authenticate(user=create_staff_user("staffuser"))
+
+    response, body = _export(api_client, "csv")
+
+    assert response["Content-Disposition"] == 'attachment; filename="pizzas.csv"'
+    rows = list(csv.reader(StringIO(body)))
+    assert rows == [
+        ["id", "name", "price", "status", "ingredient_ids", "ingredient_names"],
+        [
+            str(pizza.id),
+            "Margherita, classic",
+            "10.50",
+            "active",
+            f"{tomato.id}|{cheese.id}",
+            "Tomato|Mozzarella",
+        ],
+    ]
+
+
+@pytest.mark.django_db
+def test_export_reads_in_fixed_size_chunks(
+    api_client, create_staff_user, settings, django_assert_num_queries
+):
+    """Test that each chunk costs one pizza query and one ingredient query."""
+    settings.PIZZERIA_EXPORT_CHUNK_SIZE = 2
+    tomato = Ingredient.objects.create(name="Tomato")
+    for i in range(5):
+        Pizza.objects.create(name=f"Pizza {i}", price=10).ingredients.add(tomato)
+    api_client.force_authenticate(user=create_staff_user("staffuser"))
+    response = api_client.get("/api/pizzas/export.ndjson")
+
+    with django_assert_num_queries(6):
+        lines = b"".join(response.streaming_content).splitlines()
+    assert len(lines) == 5
+
+
+@pytest.mark.django_db
+def test_export_ignores_accept_header(api_client, create_staff_user):
+    """Test that the URL picks the export format whatever the client accepts."""
+    Pizza.objects.create(name="Margherita", price=10.50)
+    api_client.force_authenticate(user=create_staff_user("staffuser"))
+
+    for export_format, accept, content_type in [
+        ("ndjson", "application/x-ndjson", "application/x-ndjson"),
+        ("csv", "text/csv", "text/csv; charset=utf-8"),
+        ("csv", "application/json", "text/csv; charset=utf-8"),
+    ]:
+        response = api_client.get(
+            f"/api/pizzas/export.{export_format}", HTTP_ACCEPT=accept
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Content-Type"] == content_type
+        assert b"Margherita" in b"".join(response.streaming_content)
+
+    api_client.force_authenticate(user=None)
+    response = api_client.get("/api/pizzas/export.csv", HTTP_ACCEPT="text/csv")
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_export_as_regular_user(api_client, create_user):
+    """Test that the export is limited to staff."""
+    api_client.force_authenticate(user=create_user("regularuser"))
+
+    response = api_client.get("/api/pizzas/export.ndjson")
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    assert api_client.get("/api/pizzas/export.xml").status_code == 404
+
+
+def _import_catalog(*args):
+    out = StringIO()
+    call_command(
+        "import_catalog", *[str(arg) for arg in args], stdout=out, stderr=StringIO()
+    )
+    return out.getvalue()
+
+
+@pytest.mark.django_db
+def test_import_catalog_from_csv(tmp_path):
+    """Test that a CSV import creates pizzas, ingredients and their links."""
+    Ingredient.objects.create(name="Tomato")
+    (tmp_path / "ingredients.csv").write_text("name,category\nBasil,premium\n")
+    (tmp_path / "pizzas.csv").write_text(
+        "name,price,status,ingredients\n"
+        "Margherita,10.50,active,Tomato|Basil|Mozzarella\n"
+        "Marinara,8.00,inactive,Tomato\n"
+    )
+
+    output = _import_catalog(
+        tmp_path / "pizzas.csv", "--ingredients", tmp_path / "ingredients.csv"
+    )
+
+    assert "2 pizza(s) (2 created, 0 updated)" in output
+    assert "2 new ingredient(s)" in output
+    assert "rows/s" in output
+    margherita = Pizza.objects.get(name="Margherita")
+    assert sorted(margherita.ingredients.values_list("name", flat=True)) == [
+        "Basil",
+        "Mozzarella",
+        "Tomato",
+    ]
+    assert Pizza.objects.get(name="Marinara").status == "inactive"
+    assert Ingredient.objects.get(name="Basil").category == "premium"
+    assert Ingredient.objects.get(name="Tomato").pizza_count == 2
+
+
+@pytest.mark.django_db
+def test_import_catalog_round_trips_the_export(tmp_path, api_client, create_staff_user):
+    """Test that re-importing an NDJSON export updates instead of duplicating."""
+    pizza = Pizza.objects.create(name="Margherita", price=10.50)
+    pizza.ingredients.add(Ingredient.objects.create(name="Basil", category="premium"))
+    api_client.force_authenticate(user=create_staff_user("staffuser"))
+    _, body = _export(api_client, "ndjson")
+    (tmp_path / "menu.ndjson").write_text(body)
+    Pizza.objects.all().delete()
+    Ingredient.objects.all().delete()
+
+    first = _import_catalog(tmp_path / "menu.ndjson", "--batch-size", 1)
+    second = _import_catalog(tmp_path / "menu.ndjson", "--batch-size", 1)
+
+    assert "(1 created, 0 updated)" in first
+    assert "(0 created, 1 updated) and 0 new ingredient(s)" in second
+    assert Pizza.objects.count() == 1
+    assert Ingredient.objects.get().category == "premium"
+    _, reexported = _export(api_client, "ndjson")
+    assert json.loads(reexported)["ingredients"][0]["name"] == "Basil"
+
+
+@pytest.mark.django_db
+def test_import_catalog_dry_run(tmp_path):
+    """Test that a dry run reports the changes without writing them."""
+    Pizza.objects.create(name="Margherita", price=9.00)
+    (tmp_path / "pizzas.json").write_text(
+        json.dumps(
+            [
+                {"name": "Margherita", "price": "10.50", "ingredients": ["Tomato"]},
+                {"name": "Marinara", "price": "8.00", "ingredients": []},
+            ]
+        )
+    )
+
+    output = _import_catalog(tmp_path / "pizzas.json", "--dry-run")
+
+    assert "Would import 2 pizza(s) (1 created, 1 updated)" in output
+    assert "1 new ingredient(s)" in output
+    assert Pizza.objects.count() == 1
+    assert Ingredient.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_import_catalog_rejects_invalid_rows(tmp_path):
+    """Test that validation runs before anything is written."""
+    (tmp_path / "pizzas.csv").write_text(
+        "name,price,ingredients\nMargherita,10.50,Tomato\nMarinara,cheap,\n"
+    )
+
+    with pytest.raises(CommandError, match="line 3: price"):
+        _import_catalog(tmp_path / "pizzas.csv")
+
+    assert Pizza.objects.count() == 0
+    assert Ingredient.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_pizza_list_view_conditional_get(api_client, django_assert_num_queries):
+    """Test that an unchanged menu answers If-None-Match with 304 and no queries."""
+    Pizza.objects.create(name="Margherita", price=10.50)
+    response = api_client.get("/api/pizzas/")
+    etag = response["ETag"]
+    assert response.status_code == status.HTTP_200_OK
+    assert response["Last-Modified"]
+
+    with django_assert_num_queries(0):
+        response = api_client.get("/api/pizzas/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response["ETag"] == etag
+
+    last_modified = api_client.get("/api/pizzas/")["Last-Modified"]
+    response = api_client.get("/api/pizzas/", HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.django_db
+def test_conditional_get_changes_after_writes(api_client):
+    """Test that writes to pizzas, ingredients and their links change the ETag."""
+    pizza = Pizza.objects.create(name="Margherita", price=10.50)
+    tomato = Ingredient.objects.create(name="Tomato")
+    detail_url = f"/api/pizzas/{pizza.id}/"
+
+    def etags():
+        return (
+            api_client.get("/api/pizzas/")["ETag"],
+            api_client.get(detail_url)["ETag"],
+        )
+
+    seen = [etags()]
+    pizza.ingredients.add(tomato)
+    seen.append(etags())
+    tomato.name = "Roma Tomato"
+    tomato.save()
+    seen.append(etags())
+    pizza.price = 11.00
+    pizza.save()
+    seen.append(etags())
+
+    assert len(set(seen)) == len(seen)
+    response = api_client.get(detail_url, HTTP_IF_NONE_MATCH=seen[0][1])
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["ingredients"][0]["name"] == "Roma Tomato"
+
+
+@pytest.mark.django_db
+def test_conditional_get_variants_for_staff_and_anonymous(
+    api_client, create_staff_user
+):
+    """Test that staff and anonymous listings never share validators."""
+    Pizza.objects.create(name="Margherita", price=10.50)
+    Pizza.objects.create(name="Old", price=8.00, status="inactive")
+
+    anonymous = api_client.get("/api/pizzas/")
+    api_client.force_authenticate(user=create_staff_user("staffuser"))
+    response = api_client.get("/api/pizzas/", HTTP_IF_NONE_MATCH=anonymous["ETag"])
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response["ETag"] != anonymous["ETag"]
+    assert len(response.data["results"]) == 2
+    assert "Authorization" in response["Vary"]
+
+
+@pytest.mark.django_db
+def test_async_read_views_match_sync_views(api_client, create_staff_user):
+    """Test that the async read endpoints return the same payloads as the sync ones."""
+    pizza = Pizza.objects.create(name="Margherita", price=10.50)
+    pizza.ingredients.add(Ingredient.objects.create(name="Tomato"))
+    Pizza.objects.create(name="Old", price=8.00, status="inactive")
+
+    for sync_url, async_url in [
+        ("/api/pizzas/", "/api/async/pizzas/"),
+        (f"/api/pizzas/{pizza.id}/", f"/api/async/pizzas/{pizza.id}/"),
+    ]:
+        expected = api_client.get(sync_url)
+        response = api_client.get(async_url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == expected.json()
+        assert response["ETag"] != expected["ETag"]
+
+    api_client.force_authenticate(user=create_staff_user("staffuser"))
+    for sync_url, async_url in [
+        ("/api/pizzas/", "/api/async/pizzas/"),
+        ("/api/ingredients/", "/api/async/ingredients/"),
+    ]:
+        assert api_client.get(async_url).json() == api_client.get(sync_url).json()
+
+
+@pytest.mark.django_db
+def test_async_read_views_permissions(api_client, create_user):
+    """Test that the async read endpoints enforce the sync views' permissions."""
+    response = api_client.get("/api/async/pizzas/999/")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    response = api_client.get("/api/async/ingredients/")
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    api_client.force_authenticate(user=create_user("regularuser"))
+    response = api_client.get("/api/async/ingredients/")
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    response = api_client.post("/api/async/pizzas/", {}, format="json")
+    assert response.status_code == status.HTTP_405_METHOD_NOT_ALLOWED
+
+
+@pytest.mark.django_db
+def test_async_pizza_list_conditional_get(api_client):
+    """Test that the async list answers If-None-Match with 304."""
+    Pizza.objects.create(name="Margherita", price=10.50)
+    etag = api_client.get("/api/async/pizzas/")["ETag"]
+
+    response = api_client.get("/api/async/pizzas/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response["ETag"] == etag
+
+
+@pytest.fixture
+def database_cache(settings):
+    """Fixture to back every cache with ``DatabaseCache``, which needs the ORM."""
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "test_cache_table",
+        }
+    }
+    call_command("createcachetable", verbosity=0)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("shared", [False, True])
+def test_import_catalog_warns_about_process_local_cache(tmp_path, request, shared):
+    """Test that importing with a per-process cache warns that servers won't notice."""
+    if shared:
+        request.getfixturevalue("database_cache")
+    pizzas_file = tmp_path / "pizzas.csv"
+    pizzas_file.write_text("name,price,status,ingredients\nMargherita,10.50,active,\n")
+    err = StringIO()
+
+    call_command("import_catalog", str(pizzas_file), stdout=StringIO(), stderr=err)
+
+    assert ("local to this process" in err.getvalue()) is not shared
+    assert Pizza.objects.filter(name="Margherita").exists()
+
+
+@pytest.mark.django_db
+def test_async_read_views_with_database_cache(api_client, database_cache):
+    """Test that the async views reach a database-backed cache off the event loop."""
+    pizza = Pizza.objects.create(name="Margherita", price=10.50)
+    pizza.ingredients.add(Ingredient.objects.create(name="Tomato"))
+
+    for url in ["/api/async/pizzas/", f"/api/async/pizzas/{pizza.id}/"]:
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        cached = api_client.get(url)
+        assert cached.json() == response.json()
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert api_client.get(f"/api/pizzas/{pizza.id}/").json()["name"] == "Margherita"
+
+
+def _query_plan(sql, params=()):
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+        return " ".join(row[-1] for row in cursor.fetchall())
+
+
+@pytest.mark.skipif(connection.vendor != "sqlite", reason="SQLite query plans")
+@pytest.mark.django_db
+def test_public_pizza_list_uses_status_index(api_client):
+    """Test that the public listing is served by the (status, id) index."""
+    Pizza.objects.create(name="Margherita", price=10.50)
+
+    with CaptureQueriesContext(connection) as queries:
+        api_client.get("/api/pizzas/")
+
+    plan = _query_plan(queries.captured_queries[0]["sql"])
+    assert "USING INDEX pizza_status_id_idx" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+@pytest.mark.skipif(connection.vendor != "sqlite", reason="SQLite query plans")
+@pytest.mark.django_db
+def test_name_and_category_lookups_use_indexes():
+    """Test that name and category lookups do not scan the tables."""
+    plans = {
+        "pizza_name_idx": Pizza.objects.filter(name__in=["Margherita"]),
+        "ingredient_name_idx": Ingredient.objects.filter(name="Tomato"),
+        "ingredient_category_idx": Ingredient.objects.filter(category="premium"),
+    }
+
+    for index_name, queryset in plans.items():
+        plan = _query_plan(*queryset.query.sql_with_params())
+        assert f"USING INDEX {index_name}" in plan
+
+
+@pytest.mark.django_db
+def test_ingredient_pizza_count_is_maintained():
+    """Test that pizza_count follows add/remove/clear/set from both sides."""
+    tomato = Ingredient.objects.create(name="Tomato")
+    cheese = Ingredient.objects.create(name="Cheese")
+    margherita = Pizza.objects.create(name="Margherita", price=10.50)
+    pepperoni = Pizza.objects.create(name="Pepperoni", price=12.00)
+
+    def counts():
+        return dict(Ingredient.objects.values_list("name", "pizza_count"))
+
+    margherita.ingredients.add(tomato, cheese)
+    tomato.pizzas.add(pepperoni)
+    assert counts() == {"Tomato": 2, "Cheese": 1}
+
+    margherita.ingredients.remove(tomato)
+    assert counts() == {"Tomato": 1, "Cheese": 1}
+
+    pepperoni.ingredients.set([cheese])
+    assert counts() == {"Tomato": 0, "Cheese": 2}
+
+    cheese.pizzas.clear()
+    assert counts() == {"Tomato": 0, "Cheese": 0}
+
+    pepperoni.ingredients.add(tomato)
+    pepperoni.delete()
+    assert counts() == {"Tomato": 0, "Cheese": 0}
+
+
+@pytest.mark.django_db
+def test_ingredient_serializer_exposes_pizza_count(api_client, create_staff_user):
+    """Test that the ingredient endpoints report how many pizzas use it."""
+    staff_user = create_staff_user("staffuser")
+    api_client.force_authenticate(user=staff_user)
+    tomato = Ingredient.objects.create(name="Tomato")
+    Pizza.objects.create(name="Margherita", price=10.50).ingredients.add(tomato)
+
+    response = api_client.get(f"/api/ingredients/{tomato.id}/")
+    assert response.data["pizza_count"] == 1
+
+    api_client.patch(
+        f"/api/ingredients/{tomato.id}/", {"pizza_count": 10}, format="json"
+    )
+    tomato.refresh_from_db()
+    assert tomato.pizza_count == 1
+
+
+@pytest.mark.django_db
+def test_reconcile_ingredient_counts_command():
+    """Test that the reconcile command repairs drifted counters."""
+    tomato = Ingredient.objects.create(name="Tomato")
+    cheese = Ingredient.objects.create(name="Cheese")
+    Pizza.objects.create(name="Margherita", price=10.50).ingredients.add(tomato)
+    Ingredient.objects.filter(pk=tomato.pk).update(pizza_count=0)
+    Ingredient.objects.filter(pk=cheese.pk).update(pizza_count=5)
+
+    out = StringIO()
+    call_command("reconcile_ingredient_counts", stdout=out)
+
+    assert "Reconciled 2 drifted" in out.getvalue()
+    assert dict(Ingredient.objects.values_list("name", "pizza_count")) == {
+        "Tomato": 1,
+        "Cheese": 0,
+    }
+
+
+def _filtered_names(api_client, query, page_size=4):
+    names, url = [], f"/api/pizzas/?page_size={page_size}&{query}"
+    while url:
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        names.extend(item["name"] for item in response.data["results"])
+        url = response.data["next"]
+    return names
+
+
+def test_bitset_walks_match_sorted_ids():
+    """Test the bitset helpers against plain sorted lists, across chunk borders."""
+    rng = random.Random(7)
+    ids = sorted(rng.sample(range(20000), 300))
+    bits = to_bitset(ids)
+
+    assert ids_after(bits) == ids
+    for position in [None, 0, ids[0], 1023, 1024, ids[150], 19999]:
+        after = [pk for pk in ids if position is None or pk > position]
+        before = [pk for pk in reversed(ids) if position is None or pk < position]
+        assert ids_after(bits, position, 11) == after[:11]
+        assert ids_before(bits, position, 11) == before[:11]
+    assert ids_before(bits, 0) == []
+    assert to_bitset([]) == 0
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("use_index", [True, False])
+def test_ingredient_filters_match_brute_force(
+    api_client, create_staff_user, settings, use_index
+):
+    """Test include-all/any and exclude filters, with and without the index."""
+    settings.PIZZERIA_INGREDIENT_INDEX = use_index
+    rng = random.Random(42)
+    ingredients = Ingredient.objects.bulk_create(
+        Ingredient(name=f"Ingredient {i}") for i in range(6)
+    )
+    pizzas = Pizza.objects.bulk_create(
+        Pizza(name=f"Pizza {i}", price=9.00, status=rng.choice(["active", "inactive"]))
+        for i in range(40)
+    )
+    recipes = {}
+    for pizza in pizzas:
+        recipes[pizza.id] = set(
+            ingredient.id for ingredient in rng.sample(ingredients, rng.randint(0, 4))
+        )
+        pizza.ingredients.set(recipes[pizza.id])
+    a, b, c, d = (ingredient.id for ingredient in ingredients[:4])
+    missing = max(recipes) + 1000
+
+    cases = [
+        (f"ingredients_all={a},{b}", lambda r: {a, b} <= r),
+        (f"ingredients_any={a},{c}", lambda r: bool({a, c} & r)),
+        (f"ingredients_exclude={d}", lambda r: d not in r),
+        (
+            f"ingredients_all={a}&ingredients_any={b},{c}&ingredients_exclude={d}",
+            lambda r: a in r and bool({b, c} & r) and d not in r,
+        ),
+        (f"ingredients_all={a},{missing}", lambda r: False),
+        (f"ingredients_exclude={missing}", lambda r: True),
+    ]
+    for staff in (False, True):
+        if staff:
+            api_client.force_authenticate(user=create_staff_user("staffuser"))
+        for query, matches in cases:
+            expected = [
+                pizza.name
+                for pizza in pizzas
+                if matches(recipes[pizza.id]) and (staff or pizza.status == "active")
+            ]
+            assert _filtered_names(api_client, query) == expected, query
+
+    response = api_client.get(f"/api/async/pizzas/?ingredients_all={a}")
+    assert response.json() == api_client.get(f"/api/pizzas/?ingredients_all={a}").json()
+
+
+@pytest.mark.django_db
+def test_ingredient_filter_previous_links(api_client):
+    """Test walking a filtered list back with the previous links."""
+    tomato = Ingredient.objects.create(name="Tomato")
+    pizzas = Pizza.objects.bulk_create(
+        Pizza(name=f"Pizza {i}", price=9.00) for i in range(30)
+    )
+    for pizza in pizzas[::3]:
+        pizza.ingredients.add(tomato)
+
+    url, pages = f"/api/pizzas/?page_size=3&ingredients_all={tomato.id}", []
+    while url:
+        response = api_client.get(url)
+        pages.append([item["name"] for item in response.data["results"]])
+        url = response.data["next"]
+    assert sum(pages, []) == [pizza.name for pizza in pizzas[::3]]
+
+    back, url = [], response.data["previous"]
+    while url:
+        response = api_client.get(url)
+        back.insert(0, [item["name"] for item in response.data["results"]])
+        url = response.data["previous"]
+    assert back == pages[:-1]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_ingredient_index_follows_writes(api_client, monkeypatch):
+    """Test that M2M, status and bulk writes publish patched copies of the index."""
+    tomato = Ingredient.objects.create(name="Tomato")
+    cheese = Ingredient.objects.create(name="Cheese")
+    margherita = Pizza.objects.create(name="Margherita", price=10.50)
+    query = f"ingredients_all={tomato.id}"
+    index = rebuild_index()
+    builds = []
+    monkeypatch.setattr(IngredientIndex, "build", lambda generation: builds.append(1))
+    assert _filtered_names(api_client, query) == []
+
+    margherita.ingredients.add(tomato)
+    assert _filtered_names(api_client, query) == ["Margherita"]
+
+    margherita.status = "inactive"
+    margherita.save()
+    assert _filtered_names(api_client, query) == []
+
+    upsert_pizzas(
+        [{"name": "Caprese", "price": 11, "ingredients": [tomato.id, cheese.id]}]
+    )
+    assert _filtered_names(api_client, query) == ["Caprese"]
+
+    margherita.status = "active"
+    margherita.save()
+    tomato.delete()
+    assert _filtered_names(api_client, f"ingredients_any={cheese.id}") == ["Caprese"]
+    assert _filtered_names(api_client, query) == []
+    cheese.pizzas.clear()
+    assert _filtered_names(api_client, f"ingredients_any={cheese.id}") == []
+    current = get_index()
+    assert current is not None and not builds
+    assert tomato.id not in current.postings and cheese.id not in current.postings
+    # Published indexes are never modified, so concurrent lookups stay consistent.
+    assert (index.postings, index.active) == ({}, to_bitset([margherita.id]))
+
+
+@pytest.mark.django_db(transaction=True)
+def test_ingredient_index_ignores_unrelated_writes(api_client):
+    """Test that renaming an ingredient or repricing a pizza keeps the index current."""
+    tomato = Ingredient.objects.create(name="Tomato")
+    pizza = Pizza.objects.create(name="Margherita", price=10.50)
+    pizza.ingredients.add(tomato)
+    index = rebuild_index()
+    generation = index.generation
+
+    tomato.name = "San Marzano"
+    tomato.save()
+    assert get_index() is index and index.generation == generation
+
+    pizza.price = 12
+    pizza.save()
+    assert get_index().generation == generation + 1
+    assert _filtered_names(api_client, f"ingredients_all={tomato.id}") == ["Margherita"]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_ingredient_index_rebuilds_after_other_process_writes(
+    api_client, django_assert_num_queries
+):
+    """Test that a foreign write falls back to the database, then rebuilds."""
+    tomato = Ingredient.objects.create(name="Tomato")
+    Pizza.objects.create(name="Margherita", price=10.50).ingredients.add(tomato)
+    index = rebuild_index()
+    url = f"/api/pizzas/?ingredients_all={tomato.id}"
+
+    # What another process's commit looks like through the shared cache.
+    Pizza.objects.create(name="Caprese", price=11).ingredients.add(tomato)
+    next_index_generation()
+    assert get_index() is None
+
+    response = api_client.get(url)
+    assert [row["name"] for row in response.data["results"]] == [
+        "Margherita",
+        "Caprese",
+    ]
+    rebuilt = get_index()
+    assert rebuilt is not None and rebuilt is not index
+    with django_assert_num_queries(1):
+        assert api_client.get(url).data == response.data
+
+
+@pytest.mark.django_db
+def test_ingredient_filter_query_count(api_client, django_assert_num_queries):
+    """Test that a filtered page costs one query once the index is built."""
+    tomato = Ingredient.objects.create(name="Tomato")
+    for i in range(10):
+        Pizza.objects.create(name=f"Pizza {i}", price=9.00).ingredients.add(tomato)
+    index = rebuild_index()
+
+    with django_assert_num_queries(1):
+        response = api_client.get(f"/api/pizzas/?ingredients_all={tomato.id}")
+
+    assert len(response.data["results"]) == 10
+    assert get_index() is index
+
+
+@pytest.mark.django_db
+def test_ingredient_filter_rejects_invalid_ids(api_client):
+    """Test that non-numeric ingredient ids are a 400."""
+    response = api_client.get("/api/pizzas/?ingredients_any=1,tomato")
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "ingredients_any" in response.data
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("use_index", [True, False])
+def test_ingredient_filter_rejects_out_of_range_ids(api_client, settings, use_index):
+    """Test that ids outside the primary key range are a 400, not an overflow."""
+    settings.PIZZERIA_INGREDIENT_INDEX = use_index
+    for value in ["0", "-3", str(2**63), "9" * 40]:
+        response = api_client.get(f"/api/pizzas/?ingredients_all=1,{value}")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "ingredients_all" in response.data
+
+    response = api_client.get(f"/api/pizzas/?ingredients_all={2**63 - 1}")
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_ingredient_filter_with_forged_cursor_position(api_client):
+    """Test that out-of-range cursor positions never reach the bitset shifts."""
+    tomato = Ingredient.objects.create(name="Tomato")
+    Pizza.objects.create(name="Margherita", price=10).ingredients.add(tomato)
+    paginator = CatalogCursorPagination()
+    url = f"/api/pizzas/?ingredients_all={tomato.id}"
+    paginator.base_url = "http://testserver" + url
+
+    for reverse, position in [(False, "-5"), (True, str(10**18))]:
+        cursor = paginator.encode_cursor(Cursor(0, reverse, position))
+        response = api_client.get(cursor)
+        assert response.status_code == status.HTTP_200_OK
+        assert [row["name"] for row in response.data["results"]] == ["Margherita"]
+    cursor = paginator.encode_cursor(Cursor(0, False, "tomato"))
+    assert api_client.get(cursor).status_code == status.HTTP_404_NOT_FOUND
+
+
+def _brute_force_facets(pizzas, ingredients, boundaries):
+    edges = [None] + [Decimal(value) for value in boundaries] + [None]
+    prices = [pizza["price"] for pizza in pizzas]
+    statuses = Counter(pizza["status"] for pizza in pizzas)
+    categories = Counter(ingredient["category"] for ingredient in ingredients)
+    return {
+        "pizzas": {
+            "total": len(pizzas),
+            "status": statuses,
+            "price": {
+                "min": min(prices, default=None),
+                "max": max(prices, default=None),
+                "buckets": [
+                    sum(
+                        (low is None or price >= low) and (high is None or price < high)
+                        for price in prices
+                    )
+                    for low, high in zip(edges, edges[1:])
+                ],
+            },
+        },
+        "ingredients": {"total": len(ingredients), "category": categories},
+    }
+
+
+def _comparable_facets(data):
+    pizzas, price = data["pizzas"], data["pizzas"]["price"]
+    return {
+        "pizzas": {
+            "total": pizzas["total"],
+            "status": Counter({k: v for k, v in pizzas["status"].items() if v}),
+            "price": {
+                "min": price["min"] and Decimal(price["min"]),
+                "max": price["max"] and Decimal(price["max"]),
+                "buckets": [bucket["count"] for bucket in price["buckets"]],
+            },
+        },
+        "ingredients": {
+            "total": data["ingredients"]["total"],
+            "category": Counter(
+                {k: v for k, v in data["ingredients"]["category"].items() if v}
+            ),
+        },
+    }
+
+
+@pytest.mark.django_db
+def test_pizza_facets_match_brute_force(api_client, create_staff_user, settings):
+    """Test the facets against counts computed from the full lists."""
+    settings.PIZZERIA_FACET_PRICE_BUCKETS = ["10", "15", "20"]
+    rng = random.Random(3)
+    Ingredient.objects.bulk_create(
+        Ingredient(name=f"Ingredient {i}", category=rng.choice(["basic", "premium"]))
+        for i in range(12)
+    )
+    Pizza.objects.bulk_create(
+        Pizza(
+            name=f"Pizza {i}",
+            price=Decimal(rng.choice([500, 999, 1000, 1250, 1500, 2000, 2999])) / 100,
+            status=rng.choice(["active", "inactive"]),
+        )
+        for i in range(50)
+    )
+    ingredients = list(Ingredient.objects.values("category"))
+
+    response = api_client.get("/api/pizzas/facets/")
+    assert response.status_code == status.HTTP_200_OK
+    assert [
+        (bucket["min"], bucket["max"])
+        for bucket in response.data["pizzas"]["price"]["buckets"]
+    ] == [(None, "10.00"), ("10.00", "15.00"), ("15.00", "20.00"), ("20.00", None)]
+    active = list(Pizza.objects.filter(status="active").values("price", "status"))
+    assert _comparable_facets(response.data) == _brute_force_facets(
+        active, ingredients, settings.PIZZERIA_FACET_PRICE_BUCKETS
+    )
+
+    api_client.force_authenticate(user=create_staff_user("staffuser"))
+    response = api_client.get("/api/pizzas/facets/")
+    everything = list(Pizza.objects.values("price", "status"))
+    assert _comparable_facets(response.data) == _brute_force_facets(
+        everything, ingredients, settings.PIZZERIA_FACET_PRICE_BUCKETS
+    )
+
+
+@pytest.mark.django_db
+def test_pizza_facets_on_empty_catalog(api_client):
+    """Test that an empty catalog reports zero counts and no price range."""
+    response = api_client.get("/api/pizzas/facets/")
+
+    assert response.data["pizzas"]["total"] == 0
+    assert response.data["pizzas"]["status"] == {"active": 0}
+    assert response.data["pizzas"]["price"]["min"] is None
+    assert response.data["ingredients"]["category"] == {"basic": 0, "premium": 0}
+
+
+@pytest.mark.django_db
+def test_pizza_facets_are_cached_until_the_next_write(
+    api_client, django_assert_num_queries
+):
+    """Test that facets cost two queries once and none until the catalog changes."""
+    Pizza.objects.create(name="Margherita", price=10.50)
+    with django_assert_num_queries(2):
+        api_client.get("/api/pizzas/facets/")
+    with django_assert_num_queries(0):
+        response = api_client.get("/api/pizzas/facets/")
+    assert response.data["pizzas"]["total"] == 1
+
+    Pizza.objects.create(name="Pepperoni", price=25.00)
+    response = api_client.get("/api/pizzas/facets/")
+    assert response.data["pizzas"]["total"] == 2
+    assert response.data["pizzas"]["price"]["max"] == "25.00"
+    etag = response["ETag"]
+    response = api_client.get("/api/pizzas/facets/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.django_db
+def test_pizza_list_sparse_fields_skip_the_count(api_client):
+    """Test that ?fields= drops ingredients_count and its subquery."""
+    pizza = Pizza.objects.create(name="Margherita", price=10.50)
+    pizza.ingredients.add(Ingredient.objects.create(name="Tomato"))
+
+    with CaptureQueriesContext(connection) as captured:
+        response = api_client.get("/api/pizzas/?fields=name,price")
+
+    assert response.data["results"] == [{"name": "Margherita", "price": "10.50"}]
+    assert len(captured.captured_queries) == 1
+    assert "pizzeria_pizza_ingredients" not in captured.captured_queries[0]["sql"]
+
+
+@pytest.mark.django_db
+def test_pizza_list_expand_ingredients(api_client, django_assert_num_queries):
+    """Test that ?expand=ingredients embeds them with one prefetch query."""
+    tomato = Ingredient.objects.create(name="Tomato")
+    for i in range(3):
+        Pizza.objects.create(name=f"Pizza {i}", price=9.00).ingredients.add(tomato)
+
+    with django_assert_num_queries(2):
+        response = api_client.get("/api/pizzas/?fields=name&expand=ingredients")
+
+    assert response.data["results"][0] == {
+        "name": "Pizza 0",
+        "ingredients": [{"id": tomato.id, "name": "Tomato", "category": "basic"}],
+    }
+    assert "ingredients" not in api_client.get("/api/pizzas/").data["results"][0]
+
+
+@pytest.mark.django_db
+def test_pizza_detail_sparse_fields(api_client, django_assert_num_queries):
+    """Test that a narrow detail skips the prefetch and reuses the full cache entry."""
+    pizza = Pizza.objects.create(name="Margherita", price=10.50)
+    pizza.ingredients.add(Ingredient.objects.create(name="Tomato"))
+    url = f"/api/pizzas/{pizza.id}/"
+
+    with django_assert_num_queries(1):
+        response = api_client.get(f"{url}?fields=name,price")
+    assert response.data == {"name": "Margherita", "price": "10.50"}
+    assert get_pizza_detail(pizza.id) is None
+
+    full = api_client.get(url).data
+    with django_assert_num_queries(0):
+        response = api_client.get(f"{url}?fields=status,name")
+    assert response.data == {"name": full["name"], "status": full["status"]}
+
+    response = api_client.get(f"/api/async/pizzas/{pizza.id}/?fields=ingredients")
+    assert response.json() == {"ingredients": full["ingredients"]}
+
+
+@pytest.mark.django_db
+def test_sparse_fields_reject_unknown_names(api_client, create_staff_user):
+    """Test that unknown ?fields= and ?expand= names are a 400."""
+    response = api_client.get("/api/pizzas/?fields=name,secret&expand=status")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert set(response.data) == {"fields", "expand"}
+
+    api_client.force_authenticate(user=create_staff_user("staffuser"))
+    Ingredient.objects.create(name="Tomato")
+    response = api_client.get("/api/ingredients/?fields=name")
+    assert response.data["results"] == [{"name": "Tomato"}]
+    response = api_client.post(
+        "/api/ingredients/?fields=name", {"name": "Basil"}, format="json"
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.data["category"] == "basic"
+
+
+@pytest.mark.django_db
+def test_fast_list_reads_are_byte_identical(api_client, create_staff_user, settings):
+    """Test that values() pages render exactly the serializer's bytes."""
+    rng = random.Random(11)
+    ingredients = Ingredient.objects.bulk_create(
+        Ingredient(name=name, category=rng.choice(["basic", "premium"]))
+        for name in ["Tomato", "Jalapeño", 'Queso "azul"', "Ají 🌶", ""]
+    )
+    pizzas = Pizza.objects.bulk_create(
+        Pizza(
+            name=f"Pizza {i} ñ",
+            price=rng.choice(
+                [Decimal("0"), Decimal("0.01"), Decimal("9.5"), Decimal("999.99")]
+            ),
+            status=rng.choice(["active", "inactive"]),
+        )
+        for i in range(25)
+    )
+    for pizza in pizzas:
+        pizza.ingredients.set(rng.sample(ingredients, rng.randint(0, 3)))
+    staff = create_staff_user("staffuser")
+
+    urls = [
+        "/api/pizzas/?page_size=7",
+        "/api/pizzas/?fields=price,name",
+        "/api/pizzas/?fields=ingredients_count",
+        "/api/pizzas/?expand=ingredients",
+        f"/api/pizzas/?ingredients_any={ingredients[0].id},{ingredients[1].id}",
+        "/api/async/pizzas/?page_size=5",
+        "/api/ingredients/",
+        "/api/ingredients/?fields=pizza_count,category",
+        "/api/async/ingredients/",
+    ]
+    for user in (None, staff):
+        api_client.force_authenticate(user=user)
+        for url in urls:
+            pages = {}
+            for fast in (False, True):
+                settings.PIZZERIA_FAST_READS = fast
+                pages[fast], next_url = [], url
+                while next_url:
+                    response = api_client.get(next_url)
+                    pages[fast].append(response.content)
+                    next_url = response.json().get("next")
+            assert pages[True] == pages[False], url
+
+
+@pytest.mark.django_db
+def test_fast_list_reads_skip_serializers(api_client, settings, monkeypatch):
+    """Test that fast pages never instantiate the list serializer."""
+    settings.PIZZERIA_FAST_READS = True
+    Pizza.objects.create(name="Margherita", price=10.50)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("serializer used")
+
+    monkeypatch.setattr(PizzaSerializer, "to_representation", fail)
+    response = api_client.get("/api/pizzas/")
+    assert response.data["results"] == [
+        {"name": "Margherita", "price": "10.50", "ingredients_count": 0}
+    ]
+
+
+def _writes(captured):
+    return [
+        query["sql"].split()[0] + " " + query["sql"].split('"')[1]
+        for query in captured.captured_queries
+        if query["sql"].split()[0] in ("INSERT", "UPDATE", "DELETE")
+    ]
+
+
+@pytest.mark.django_db
+def test_update_pizza_without_changes_writes_nothing(api_client, create_staff_user):
+    """Test that a PUT repeating the stored pizza issues no writes."""
+    api_client.force_authenticate(user=create_staff_user("staffuser"))
+    tomato = Ingredient.objects.create(name="Tomato")
+    pizza = Pizza.objects.create(name="Margherita", price=10.50)
+    pizza.ingredients.add(tomato)
+    payload = {
+        "name": "Margherita",
+        "price": "10.50",
+        "status": "active",
+        "ingredients": [tomato.id],
+    }
+    etag = api_client.get("/api/pizzas/")["ETag"]
+
+    with CaptureQueriesContext(connection) as captured:
+        response = api_client.put(
+            f"/api/pizzas/{pizza.id}/update/", payload, format="json"
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert _writes(captured) == []
+    assert api_client.get("/api/pizzas/", HTTP_IF_NONE_MATCH=etag).status_code == (
+        status.HTTP_304_NOT_MODIFIED
+    )
+
+
+@pytest.mark.django_db
+def test_update_pizza_writes_only_the_ingredient_delta(api_client, create_staff_user):
+    """Test that swapping one ingredient is one DELETE and one INSERT on the links."""
+    api_client.force_authenticate(user=create_staff_user("staffuser"))
+    tomato, cheese, basil, ham = Ingredient.objects.bulk_create(
+        Ingredient(name=name) for name in ["Tomato", "Cheese", "Basil", "Ham"]
+    )
+    pizza = Pizza.objects.create(name="Margherita", price=10.50)
+    pizza.ingredients.add(tomato, cheese, basil)
+    api_client.get(f"/api/pizzas/{pizza.id}/")
+
+    with CaptureQueriesContext(connection) as captured:
+        response = api_client.patch(
+            f"/api/pizzas/{pizza.id}/update/",
+            {"ingredients": [tomato.id, cheese.id, ham.id]},
+            format="json",
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert _writes(captured) == [
+        "DELETE pizzeria_pizza_ingredients",
+        "INSERT pizzeria_pizza_ingredients",
+        "UPDATE pizzeria_ingredient",
+    ]
+    assert set(pizza.ingredients.values_list("name", flat=True)) == {
+        "Tomato",
+        "Cheese",
+        "Ham",
+    }
+    assert dict(Ingredient.objects.values_list("name", "pizza_count")) == {
+        "Tomato": 1,
+        "Cheese": 1,
+        "Basil": 0,
+        "Ham": 1,
+    }
+    response = api_client.get(f"/api/pizzas/{pizza.id}/")
+    assert [item["name"] for item in response.data["ingredients"]] == [
+        "Tomato",
+        "Cheese",
+        "Ham",
+    ]
+    assert _filtered_names(api_client, f"ingredients_all={ham.id}") == ["Margherita"]
+
+    with CaptureQueriesContext(connection) as captured:
+        api_client.patch(
+            f"/api/pizzas/{pizza.id}/update/", {"price": "12.00"}, format="json"
+        )
+    assert _writes(captured) == ["UPDATE pizzeria_pizza"]
@@ -1,11 +1,20 @@
-from django.urls import path
+from django.urls import path, re_path
+from .async_views import (
+    AsyncPizzaListView,
+    AsyncPizzaDetailView,
+    AsyncIngredientListView,
+)
 from .views import (
     PizzaListView,
     PizzaDetailView,
     PizzaCreateView,
+    PizzaBulkUpsertView,
+    PizzaExportView,
+    PizzaFacetsView,
     PizzaUpdateView,
     PizzaAddIngredientView,
     PizzaRemoveIngredientView,
+    PizzaIngredientsBatchView,
     IngredientListCreateView,
     IngredientRetrieveUpdateDestroyView,
 )
@@ -13,6 +22,13 @@ from .views import (
 urlpatterns = [
     path("pizzas/", PizzaListView.as_view(), name="pizza-list"),
     path("pizzas/create/", PizzaCreateView.as_view(), name="pizza-create"),
+    path("pizzas/bulk/", PizzaBulkUpsertView.as_view(), name="pizza-bulk-upsert"),
+    re_path(
+        r"^pizzas/export\.(?P<export_format>ndjson|csv)$",
+        PizzaExportView.as_view(),
+        name="pizza-export",
+    ),
+    path("pizzas/facets/", PizzaFacetsView.as_view(), name="pizza-facets"),
     path("pizzas/<int:pk>/", PizzaDetailView.as_view(), name="pizza-detail"),
     path("pizzas/<int:pk>/update/", PizzaUpdateView.as_view(), name="pizza-update"),
     path(
@@ -25,6 +41,11 @@ urlpatterns = [
         PizzaRemoveIngredientView.as_view(),
         name="pizza-remove-ingredient",
     ),
+    path(
+        "pizzas/<int:pk>/ingredients/",
+        PizzaIngredientsBatchView.as_view(),
+        name="pizza-ingredients-batch",
+    ),
     path(
         "ingredients/",
         IngredientListCreateView.as_view(),
@@ -35,4 +56,15 @@ urlpatterns = [
         IngredientRetrieveUpdateDestroyView.as_view(),
         name="ingredient-detail-update-destroy",
     ),
+    path("async/pizzas/", AsyncPizzaListView.as_view(), name="async-pizza-list"),
+    path(
+        "async/pizzas/<int:pk>/",
+        AsyncPizzaDetailView.as_view(),
+        name="async-pizza-detail",
+    ),
+    path(
+        "async/ingredients/",
+        AsyncIngredientListView.as_view(),
+        name="async-ingredient-list",
+    ),
 ]
@@ -1,3 +1,6 @@
+from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 
 from rest_framework import generics, status
@@ -6,29 +9,106 @@ from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from .caching import (
+    get_menu_facets,
+    get_pizza_detail,
+    set_menu_facets,
+    set_pizza_detail,
+)
+from .export import EXPORT_FORMATS, ExportContentNegotiation
+from .facets import compute_facets
+from .filters import IngredientFilter
+from .mixins import ConditionalGetMixin, FastListMixin, FieldSelectionMixin
 from .models import Ingredient, Pizza
+from .pagination import CatalogCursorPagination
 from .serializers import (
     PizzaSerializer,
     PizzaDetailSerializer,
     PizzaCreateUpdateSerializer,
+    PizzaBulkSerializer,
+    PizzaIngredientsBatchSerializer,
     IngredientSerializer,
 )
 
 
-class PizzaListView(generics.ListAPIView):
+class PizzaListView(
+    FastListMixin, FieldSelectionMixin, ConditionalGetMixin, generics.ListAPIView
+):
     serializer_class = PizzaSerializer
+    pagination_class = CatalogCursorPagination
+    filter_backends = [IngredientFilter]
 
-    def get_queryset(self):
+    def include_inactive(self):
         user = self.request.user
-        if user.is_authenticated and (user.is_staff or user.is_superuser):
-            return Pizza.objects.all()
+        return user.is_authenticated and (user.is_staff or user.is_superuser)
+
+    def get_queryset(self):
+        if self.include_inactive():
+            queryset = Pizza.objects.all()
         else:
-            return Pizza.objects.filter(status="active")
+            queryset = Pizza.objects.filter(status="active")
+        selected = self.get_selected_fields()
+        if "ingredients_count" in selected:
+            queryset = queryset.with_ingredients_count()
+        if "ingredients" in selected:
+            queryset = queryset.prefetch_related("ingredients")
+        return queryset
+
+
+class PizzaFacetsView(ConditionalGetMixin, APIView):
+    """
+    Counts per pizza status and ingredient category, price buckets and the
+    price range, for the pizzas the caller can list.
+    """
+
+    def get(self, request):
+        response = self.get_not_modified_response(request)
+        if response is None:
+            variant = self.get_validator_variant(request)
+            version = self.validators[1]["version"]
+            data = get_menu_facets(variant, version)
+            if data is None:
+                data = compute_facets(include_inactive=variant == "staff")
+                set_menu_facets(variant, version, data)
+            response = Response(data)
+        return self.add_validators(response)
+
+
+class PizzaDetailView(
+    FieldSelectionMixin, ConditionalGetMixin, generics.RetrieveAPIView
+):
+    serializer_class = PizzaDetailSerializer
 
+    def get_queryset(self):
+        queryset = Pizza.objects.all()
+        if "ingredients" in self.get_selected_fields():
+            queryset = queryset.prefetch_related("ingredients")
+        return queryset
+
+    def get_cached_data(self, pk):
+        """Return the cached detail narrowed to the selected fields, if any."""
+        return self.select_cached_fields(get_pizza_detail(pk))
+
+    def select_cached_fields(self, data):
+        selected = self.get_selected_fields()
+        if data is None or not set(selected) <= set(data):
+            return None
+        return {name: data[name] for name in selected}
+
+    def set_cached_data(self, pk, data):
+        # Only full representations are cached: narrower ones are answered
+        # from them, and invalidation has a single key per pizza to drop.
+        if self.selects_default_fields():
+            set_pizza_detail(pk, data)
 
-class PizzaDetailView(generics.RetrieveAPIView):
-    queryset = Pizza.objects.all()
-    serializer_class = PizzaDetailSerializer
+    def retrieve(self, request, *args, **kwargs):
+        pk = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        data = self.get_cached_data(pk)
+        if data is None:
+            serializer = self.get_serializer(self.get_object())
+            data = serializer.data
+            self.set_cached_data(pk, data)
+        return Response(data)
 
 
 class PizzaCreateView(generics.CreateAPIView):
@@ -37,6 +117,31 @@ class PizzaCreateView(generics.CreateAPIView):
     permission_classes = [IsAdminUser]
 
 
+class PizzaBulkUpsertView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        serializer = PizzaBulkSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        results = serializer.save()
+        return Response(results, status=status.HTTP_200_OK)
+
+
+class PizzaExportView(APIView):
+    permission_classes = [IsAdminUser]
+    content_negotiation_class = ExportContentNegotiation
+
+    def get(self, request, export_format):
+        content_type, rows = EXPORT_FORMATS[export_format]
+        response = StreamingHttpResponse(
+            rows(settings.PIZZERIA_EXPORT_CHUNK_SIZE), content_type=content_type
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="pizzas.{export_format}"'
+        )
+        return response
+
+
 class PizzaUpdateView(generics.RetrieveUpdateAPIView):
     queryset = Pizza.objects.all()
     serializer_class = PizzaCreateUpdateSerializer
@@ -79,20 +184,62 @@ class PizzaRemoveIngredientView(APIView):
         return Response({"status": "ingredient removed"}, status=status.HTTP_200_OK)
 
 
-class IngredientListCreateView(generics.ListCreateAPIView):
+class PizzaIngredientsBatchView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def post(self, request, pk):
+        pizza = get_object_or_404(Pizza, pk=pk)
+        serializer = PizzaIngredientsBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        to_add = set(serializer.validated_data["add"])
+        to_remove = set(serializer.validated_data["remove"])
+
+        requested = to_add | to_remove
+        found = set(
+            Ingredient.objects.filter(pk__in=requested).values_list("pk", flat=True)
+        )
+        missing = sorted(requested - found)
+        if missing:
+            return Response(
+                {"detail": "Some ingredients do not exist.", "missing": missing},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        with transaction.atomic():
+            if to_add:
+                pizza.ingredients.add(*to_add)
+            if to_remove:
+                pizza.ingredients.remove(*to_remove)
+
+        return Response(
+            {
+                "status": "ingredients updated",
+                "added": sorted(to_add),
+                "removed": sorted(to_remove),
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class IngredientListCreateView(
+    FastListMixin, FieldSelectionMixin, generics.ListCreateAPIView
+):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = [IsAdminUser]
+    pagination_class = CatalogCursorPagination
 
 
-class IngredientRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class IngredientRetrieveUpdateDestroyView(
+    FieldSelectionMixin, generics.RetrieveUpdateDestroyAPIView
+):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = [IsAdminUser]
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
-        if instance.pizzas.exists():
+        if instance.pizza_count:
             raise ValidationError(
                 "Cannot delete ingredient as it is used by one or more pizzas."
             )